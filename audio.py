@@ -0,0 +1,152 @@
+"""Synthesized audio of chord voicings.
+
+Each string is modelled as a plucked string with decaying harmonics, where
+higher harmonics fade faster than lower ones. Waveforms of all distinct
+pitches are computed at once with NumPy and chords are mixed from them, with
+strings strummed from the lowest to the highest. Clips are cached as WAV files
+keyed by the tuning and the diagram.
+"""
+
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from os import cpu_count, makedirs, path
+
+import numpy as np
+
+from cache import atomic_write
+from utils import TUNINGS, note_to_midi
+
+# Bump when the synthesis changes to invalidate cached clips
+AUDIO_VERSION = 1
+CACHE_DIR = path.join('.cache', 'audio', f'v{AUDIO_VERSION}')
+
+SAMPLE_RATE = 16000
+NOTE_DURATION = 1.6
+STRUM_DELAY = 0.03
+ATTACK = 0.003
+
+HARMONICS = 16
+# Relative position of the pluck along the string
+PLUCK_POSITION = 0.2
+# Decay rate of the fundamental and the increase per kHz of a harmonic
+DECAY = 1.5
+DECAY_PER_KHZ = 4.0
+PEAK = 0.8
+
+# Worker processes only pay off for many clips
+CLIPS_PER_WORKER = 64
+
+
+def chord_pitches(tuning, diagram):
+    """Returns the MIDI note numbers of the played strings of a diagram."""
+    strings = [note_to_midi(note) for note in TUNINGS.get(tuning, tuning).split()]
+    if len(strings) != len(diagram):
+        raise ValueError(f'Diagram {diagram} does not match tuning {tuning}')
+    return [s + fret for s, fret in zip(strings, diagram) if fret is not None]
+
+
+def note_waves(pitches):
+    """Returns a waveform of a plucked string for each MIDI note number, as
+    rows of a matrix."""
+    pitches = np.asarray(pitches, dtype=np.float32)
+    num_samples = int(NOTE_DURATION * SAMPLE_RATE)
+    t = np.arange(num_samples, dtype=np.float32) / SAMPLE_RATE
+
+    harmonics = np.arange(1, HARMONICS + 1, dtype=np.float32)
+    frequencies = 440 * 2 ** ((pitches[:, None] - 69) / 12) * harmonics
+    amplitudes = np.sin(np.pi * PLUCK_POSITION * harmonics) / harmonics**2
+    amplitudes = np.where(frequencies < SAMPLE_RATE / 2, amplitudes, 0)
+    decays = DECAY + DECAY_PER_KHZ * frequencies / 1000
+
+    waves = np.zeros((len(pitches), num_samples), dtype=np.float32)
+    for h in range(HARMONICS):
+        envelope = np.exp(-decays[:, h, None] * t)
+        phase = 2 * np.pi * frequencies[:, h, None] * t
+        waves += amplitudes[:, h, None] * envelope * np.sin(phase)
+
+    attack = np.minimum(t / ATTACK, 1)
+    return waves * attack
+
+
+def strum(voicings, max_strings):
+    """Mixes a clip for each voicing, given as a list of MIDI note numbers,
+    and returns them as rows of a 16-bit sample matrix."""
+    pitches = sorted({p for voicing in voicings for p in voicing})
+    waves = note_waves(pitches)
+    rows = {pitch: i for i, pitch in enumerate(pitches)}
+
+    delay = int(STRUM_DELAY * SAMPLE_RATE)
+    length = waves.shape[1] + delay * (max_strings - 1)
+    clips = np.zeros((len(voicings), length), dtype=np.float32)
+    for clip, voicing in zip(clips, voicings):
+        for i, pitch in enumerate(voicing):
+            clip[i * delay : i * delay + waves.shape[1]] += waves[rows[pitch]]
+
+    # All clips are normalized and converted at once
+    peaks = np.abs(clips).max(axis=1, keepdims=True)
+    clips *= PEAK / np.maximum(peaks, 1e-9)
+    return np.round(clips * 32767).astype('<i2')
+
+
+def write_wav(filepath, samples):
+    with atomic_write(filepath) as temp_path, wave.open(temp_path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+
+
+def synthesize(voicings, max_strings, filepaths):
+    for samples, filepath in zip(strum(voicings, max_strings), filepaths):
+        write_wav(filepath, samples)
+
+
+def clip_filename(tuning, diagram):
+    name = TUNINGS.get(tuning, tuning).replace(' ', '-').replace('#', 's')
+    frets = '-'.join('x' if d is None else str(d) for d in diagram)
+    return f'chord_{name}_{frets}.wav'
+
+
+def chord_clips(tuning, diagrams, workers=None):
+    """Returns paths of cached audio clips of the diagrams in the tuning and
+    synthesizes the missing ones. Clips are split between worker processes if
+    there are enough of them, otherwise, or if processes are not available,
+    they are synthesized in this process."""
+    makedirs(CACHE_DIR, exist_ok=True)
+    filepaths = [path.join(CACHE_DIR, clip_filename(tuning, d)) for d in diagrams]
+
+    missing = {}
+    for diagram, filepath in zip(diagrams, filepaths):
+        if not path.exists(filepath):
+            missing[filepath] = chord_pitches(tuning, diagram)
+    if not missing:
+        return filepaths
+
+    # Clips of all workers have the same length
+    max_strings = len(TUNINGS.get(tuning, tuning).split())
+    voicings, targets = list(missing.values()), list(missing.keys())
+    workers = min(workers or cpu_count() or 1, len(voicings) // CLIPS_PER_WORKER)
+
+    if workers > 1:
+        chunk = -(-len(voicings) // workers)
+        chunks = range(0, len(voicings), chunk)
+        try:
+            with ProcessPoolExecutor(workers) as executor:
+                futures = [
+                    executor.submit(
+                        synthesize,
+                        voicings[i : i + chunk],
+                        max_strings,
+                        targets[i : i + chunk],
+                    )
+                    for i in chunks
+                ]
+                for future in futures:
+                    future.result()
+            return filepaths
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            pass
+
+    synthesize(voicings, max_strings, targets)
+    return filepaths
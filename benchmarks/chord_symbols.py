@@ -0,0 +1,66 @@
+"""Measures the throughput of parsing chord symbols and converting them into
+LaTeX on a generated corpus of chord symbols.
+
+Usage:
+    python -m benchmarks.chord_symbols [number of lookups]
+
+The corpus contains all combinations of roots, qualities, chord numbers,
+modifiers, alterations and slash basses. Symbols are parsed once without the
+cache, then looked up repeatedly with the cache, drawing common symbols more
+often than rare ones. By default, 1000000 symbols are looked up.
+"""
+
+import itertools
+from random import Random
+from sys import argv
+from time import perf_counter
+
+from chords import parse_chord_symbol
+from utils import chord_to_latex
+
+ROOTS = [letter + accidental for letter in 'ABCDEFG' for accidental in ['', '#', 'b']]
+QUALITIES = ['', 'm', 'maj', 'min', 'dim', 'aug']
+NUMBERS = ['', '5', '6', '7', '9', '11', '13', '6/9']
+MODIFIERS = ['', 'sus2', 'sus4', 'add9', 'add11']
+ALTERATIONS = ['', 'b5', '#5', 'b9', '#9', '#11', 'b13']
+BASSES = ['', '/E', '/F#', '/Bb']
+
+
+def corpus():
+    parts = [ROOTS, QUALITIES, NUMBERS, MODIFIERS, ALTERATIONS, BASSES]
+    return [''.join(symbol) for symbol in itertools.product(*parts)]
+
+
+def report(name, count, elapsed):
+    print(f'{name}: {count} symbols in {elapsed:.2f} s, {count / elapsed:,.0f}/s')
+
+
+def main():
+    num_lookups = int(argv[1]) if len(argv) > 1 else 1000000
+    symbols = corpus()
+
+    parse = parse_chord_symbol.__wrapped__
+    start = perf_counter()
+    for symbol in symbols:
+        parse(symbol)
+    report('parse', len(symbols), perf_counter() - start)
+
+    # Ranks of symbols follow Zipf's law, as names of chords in songs
+    weights = [1 / rank for rank in range(1, len(symbols) + 1)]
+    lookups = Random(0).choices(symbols, weights, k=num_lookups)
+    parse_chord_symbol.cache_clear()
+    start = perf_counter()
+    for symbol in lookups:
+        parse_chord_symbol(symbol)
+    report('cached parse', len(lookups), perf_counter() - start)
+    info = parse_chord_symbol.cache_info()
+    print(f'    cache hit rate {info.hits / (info.hits + info.misses):.1%}')
+
+    start = perf_counter()
+    for symbol in lookups:
+        chord_to_latex(symbol)
+    report('chord_to_latex', len(lookups), perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
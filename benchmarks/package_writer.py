@@ -0,0 +1,49 @@
+"""Compares writing large decks with genanki and with the bulk package writer.
+
+Usage:
+    python -m benchmarks.package_writer [number of notes ...]
+
+By default, decks with 10000 and 100000 notes are written.
+"""
+
+from os import path
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import genanki
+
+from package_writer import write_package
+from utils import card_model
+
+
+def build_deck(num_notes):
+    deck = genanki.Deck(1541482719, 'Music::Benchmark')
+    for i in range(num_notes):
+        fields = [f'Chord {i}', f'Notes of chord {i}<br><table><tr><td>{i}</td></tr>']
+        deck.add_note(genanki.Note(model=card_model, fields=fields))
+    return deck
+
+
+def main():
+    sizes = [int(arg) for arg in argv[1:]] or [10000, 100000]
+
+    for num_notes in sizes:
+        deck = build_deck(num_notes)
+        with TemporaryDirectory() as temp_dir:
+            start = perf_counter()
+            genanki.Package(deck).write_to_file(path.join(temp_dir, 'genanki.apkg'))
+            genanki_time = perf_counter() - start
+
+            start = perf_counter()
+            write_package(deck, path.join(temp_dir, 'bulk.apkg'))
+            bulk_time = perf_counter() - start
+
+        print(
+            f'{num_notes} notes: genanki {genanki_time:.2f} s, '
+            f'bulk {bulk_time:.2f} s, speedup {genanki_time / bulk_time:.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
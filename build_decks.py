@@ -0,0 +1,265 @@
+"""
+Builds all decks in one process, either as separate packages, the same as
+create_decks.sh, or as one combined package.
+
+Usage:
+    python build_decks.py [--combined] [--watch]
+
+Arguments:
+    --combined: write all decks as subdecks of Music:: into out/music.apkg
+    --watch: keep running and rebuild decks when data files or deck modules
+        change
+    --help: show script usage documentation
+
+The combined package contains the note model only once and a single copy of
+media files with equal contents, so all decks are imported at once. It is
+compared with the separate packages by their sizes and by the time it takes
+to unpack them and read their collections and media, which is the part of an
+import that can be measured without Anki. Fixed costs of each import in Anki
+itself come on top of that.
+
+In the watch mode, deck modules and built decks are kept in memory. When a
+file changes, only decks which depend on it are built again, changed deck
+modules are reloaded, and chord diagrams are only rendered for new or changed
+chords.
+"""
+
+import importlib
+import json
+import sqlite3
+import traceback
+import zipfile
+from glob import glob
+from os import makedirs, mkdir, path
+from shutil import rmtree
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+
+from package_writer import merge_media, write_package
+
+OUTPUT_DIR = 'out'
+COMBINED_FILE = 'music.apkg'
+UNPACK_REPEATS = 5
+WATCH_INTERVAL = 0.5
+WATCHED_FILES = [path.join('data', '*.csv'), path.join('decks', '*.py')]
+
+GUITAR_CHORDS = path.join('data', 'guitar_chords.csv')
+UKULELE_CHORDS = path.join('data', 'ukulele_chords.csv')
+
+# Deck module, data files and a function returning the deck and its media
+# files, given the module and a media directory, for each separate package
+PACKAGES = {
+    'circle_of_fifths.apkg': (
+        'decks.circle_of_fifths',
+        [],
+        lambda module, media_dir: module.build_deck(),
+    ),
+    'guitar_chord_notes.apkg': (
+        'decks.guitar_chord_notes',
+        [GUITAR_CHORDS],
+        lambda module, media_dir: module.build_deck('guitar', media_dir, reuse=True),
+    ),
+    'ukulele_chord_notes.apkg': (
+        'decks.guitar_chord_notes',
+        [UKULELE_CHORDS],
+        lambda module, media_dir: module.build_deck('ukulele', media_dir, reuse=True),
+    ),
+    'fretboard_notes.apkg': (
+        'decks.fretboard_notes',
+        [],
+        lambda module, media_dir: module.tuning_deck('standard', 24, media_dir),
+    ),
+    'interval_sizes.apkg': (
+        'decks.interval_sizes',
+        [],
+        lambda module, media_dir: (module.build_deck(), []),
+    ),
+    'note_distances.apkg': (
+        'decks.note_distances',
+        [],
+        lambda module, media_dir: (module.build_deck(), []),
+    ),
+}
+
+
+def main():
+    if '--help' in argv:
+        print(__doc__, end='')
+        exit(0)
+
+    if not path.exists(OUTPUT_DIR):
+        mkdir(OUTPUT_DIR)
+    combined = '--combined' in argv
+
+    with TemporaryDirectory() as media_dir:
+        start = perf_counter()
+        packages = build_packages(PACKAGES, media_dir)
+        print(f'Built {len(packages)} decks in {perf_counter() - start:.2f} s')
+
+        if combined:
+            with TemporaryDirectory() as temp_dir:
+                separate = write_separate(packages, temp_dir)
+                report(separate, write_combined(packages))
+        else:
+            write_separate(packages, OUTPUT_DIR)
+
+        if '--watch' in argv:
+            watch(packages, media_dir, combined)
+
+
+def build_packages(filenames, media_dir):
+    """Creates the decks of the given separate packages and returns them as a
+    mapping from filenames to lists of decks and media files. Each package
+    renders its media into its own subdirectory of the media directory."""
+    packages = {}
+    for filename in filenames:
+        module_name, _, build = PACKAGES[filename]
+        package_dir = path.join(media_dir, path.splitext(filename)[0])
+        makedirs(package_dir, exist_ok=True)
+        deck, media_files = build(importlib.import_module(module_name), package_dir)
+        packages[filename] = [deck], media_files
+    return packages
+
+
+def write_separate(packages, output_dir):
+    files = []
+    for filename, (decks, media_files) in packages.items():
+        files.append(path.join(output_dir, filename))
+        write_package(decks, files[-1], media_files)
+    return files
+
+
+def write_combined(packages, verbose=True):
+    """Writes all decks into one package with merged media."""
+    decks, media = merge_media(packages.values())
+    if verbose:
+        num_files = sum(len(media_files) for _, media_files in packages.values())
+        print(f'Media files: {num_files} separate, {len(media)} combined')
+
+    filepath = path.join(OUTPUT_DIR, COMBINED_FILE)
+    write_package(decks, filepath, media)
+    return filepath
+
+
+def dependencies(filename):
+    """Returns the files the separate package is built from."""
+    module_name, data_files, _ = PACKAGES[filename]
+    return [path.join(*module_name.split('.')) + '.py'] + data_files
+
+
+def modification_times():
+    return {
+        filepath: path.getmtime(filepath)
+        for pattern in WATCHED_FILES
+        for filepath in glob(pattern)
+    }
+
+
+def watch(packages, media_dir, combined):
+    """Polls watched files for changes and rebuilds the packages which depend
+    on the changed files. Errors are printed and the previous decks are kept
+    until the files are fixed."""
+    print('Watching for changes, press Ctrl+C to stop')
+    times = modification_times()
+
+    try:
+        while True:
+            sleep(WATCH_INTERVAL)
+            current = modification_times()
+            changed = current.keys() | times.keys()
+            changed = {f for f in changed if current.get(f) != times.get(f)}
+            times = current
+            if changed:
+                rebuild(packages, media_dir, combined, changed)
+    except KeyboardInterrupt:
+        pass
+
+
+def rebuild(packages, media_dir, combined, changed):
+    start = perf_counter()
+    affected = [f for f in PACKAGES if changed & set(dependencies(f))]
+    if not affected:
+        print(f'No decks depend on {", ".join(sorted(changed))}')
+        return
+
+    try:
+        # Media of changed deck modules may look different, so they are
+        # rendered again from scratch
+        reloaded = set()
+        for filename in affected:
+            module_name, _, _ = PACKAGES[filename]
+            if dependencies(filename)[0] not in changed:
+                continue
+            if module_name not in reloaded:
+                importlib.reload(importlib.import_module(module_name))
+                reloaded.add(module_name)
+            rmtree(path.join(media_dir, path.splitext(filename)[0]))
+        rebuilt = build_packages(affected, media_dir)
+    except Exception:
+        traceback.print_exc()
+        return
+
+    packages.update(rebuilt)
+    if combined:
+        write_combined(packages, verbose=False)
+    else:
+        write_separate(rebuilt, OUTPUT_DIR)
+    print(f'Rebuilt {", ".join(affected)} in {perf_counter() - start:.2f} s')
+
+
+def unpack_time(files):
+    """Returns the best time of unpacking the packages and reading models,
+    notes, cards and media from them."""
+    times = []
+    for _ in range(UNPACK_REPEATS):
+        with TemporaryDirectory() as temp_dir:
+            start = perf_counter()
+            for filepath in files:
+                with zipfile.ZipFile(filepath) as package:
+                    for name in json.loads(package.read('media')):
+                        package.read(name)
+                    collection = package.extract('collection.anki2', temp_dir)
+
+                conn = sqlite3.connect(collection)
+                models, decks = conn.execute('SELECT models, decks FROM col').fetchone()
+                json.loads(models), json.loads(decks)
+                conn.execute('SELECT * FROM notes').fetchall()
+                conn.execute('SELECT * FROM cards').fetchall()
+                conn.close()
+            times.append(perf_counter() - start)
+    return min(times)
+
+
+def report(separate, combined):
+    def models(filepath):
+        with zipfile.ZipFile(filepath) as package:
+            with TemporaryDirectory() as temp_dir:
+                conn = sqlite3.connect(package.extract('collection.anki2', temp_dir))
+                (models,) = conn.execute('SELECT models FROM col').fetchone()
+                conn.close()
+        return len(json.loads(models))
+
+    separate_size = sum(path.getsize(filepath) for filepath in separate)
+    combined_size = path.getsize(combined)
+    separate_time, combined_time = unpack_time(separate), unpack_time([combined])
+
+    print(f'Packages: {len(separate)} separate, 1 combined ({combined})')
+    print(
+        f'Note models: {sum(models(f) for f in separate)} separate, '
+        f'{models(combined)} combined'
+    )
+    print(
+        f'Size: {separate_size / 1e6:.2f} MB separate, '
+        f'{combined_size / 1e6:.2f} MB combined, '
+        f'saved {100 * (1 - combined_size / separate_size):.1f}%'
+    )
+    print(
+        f'Unpack time: {1000 * separate_time:.1f} ms separate, '
+        f'{1000 * combined_time:.1f} ms combined, '
+        f'saved {100 * (1 - combined_time / separate_time):.1f}%'
+    )
+
+
+if __name__ == '__main__':
+    main()
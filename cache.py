@@ -0,0 +1,23 @@
+"""Writing of cached files, which are reused whenever they exist."""
+
+import os
+from contextlib import contextmanager
+from os import path
+from tempfile import mkstemp
+
+
+@contextmanager
+def atomic_write(filepath):
+    """Yields a temporary path next to the file, with the same extension, and
+    moves it to the file once writing succeeds. An interrupted write leaves
+    no file behind, so a truncated file is never taken from the cache."""
+    directory, filename = path.split(filepath)
+    stem, ext = path.splitext(filename)
+    fd, temp_path = mkstemp(suffix=ext, prefix=f'{stem}.', dir=directory or '.')
+    os.close(fd)
+    try:
+        yield temp_path
+        os.replace(temp_path, filepath)
+    except BaseException:
+        os.remove(temp_path)
+        raise
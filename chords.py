@@ -0,0 +1,303 @@
+"""Chords with their diagrams and fingerings, parsing of chord symbols and
+drawing of chord diagrams as text. This module has no dependencies, so that it
+can be used by scripts that must start quickly.
+"""
+
+from functools import lru_cache
+
+# Number of frets shown in a diagram
+DIAGRAM_FRETS = 5
+
+NOTE_LETTERS = 'ABCDEFG'
+# Spellings of chord qualities with their canonical forms, in the order in
+# which they are matched
+QUALITIES = [
+    ('maj', 'maj'),
+    ('min', 'm'),
+    ('dim', 'dim'),
+    ('aug', 'aug'),
+    ('M', 'maj'),
+    ('m', 'm'),
+    ('+', 'aug'),
+    ('-', 'm'),
+]
+# Spellings of words which are followed by a degree, with their canonical
+# forms, e.g., the major seventh of CmM7
+MODIFIERS = [('sus', 'sus'), ('add', 'add'), ('maj', 'maj'), ('M', 'maj')]
+# Chord numbers and degrees which can follow modifiers and accidentals, sus
+# can also be used without one
+CHORD_NUMBERS = {'5', '6', '7', '9', '11', '13'}
+DEGREES = {
+    'sus': {'', '2', '4'},
+    'add': {'2', '4', '6', '9', '11', '13'},
+    'maj': {'7', '9', '11', '13'},
+    'b': {'5', '6', '9', '11', '13'},
+    '#': {'5', '9', '11', '13'},
+}
+
+# Spellings are looked up by their first character
+QUALITY_STARTS = {
+    c: [(spelling, q) for spelling, q in QUALITIES if spelling[0] == c]
+    for c in {spelling[0] for spelling, _ in QUALITIES}
+}
+MODIFIER_STARTS = {spelling[0]: (spelling, word) for spelling, word in MODIFIERS}
+
+
+class ChordSymbol:
+    __slots__ = ('root', 'quality', 'extensions', 'alterations', 'bass', 'tokens')
+
+    def __init__(self, root, quality, extensions, alterations, bass, tokens):
+        """Initializes a parsed chord symbol. Extensions are the chord number
+        followed by suspensions and added notes, e.g., ('7', 'sus4'), and
+        alterations are sharpened or flattened degrees, e.g., ('b5',). The bass
+        is the chord symbol after a slash, usually a single note. Tokens are
+        the parts of the symbol as it was written."""
+        self.root = root
+        self.quality = quality
+        self.extensions = extensions
+        self.alterations = alterations
+        self.bass = bass
+        self.tokens = tokens
+
+    @property
+    def name(self):
+        """Canonical name of the chord, e.g., Cm7 for Cmin7."""
+        name = self.root + self.quality + ''.join(self.extensions + self.alterations)
+        return name + ('/' + self.bass.name if self.bass else '')
+
+    def key(self):
+        return self.root, self.quality, self.extensions, self.alterations, self.bass
+
+    def __repr__(self):
+        return f'ChordSymbol({self.name})'
+
+    def __eq__(self, other):
+        if not isinstance(other, ChordSymbol):
+            return False
+        return self is other or self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+
+@lru_cache(maxsize=4096)
+def parse_chord_symbol(symbol: str) -> ChordSymbol:
+    """Parses a chord symbol, e.g., Cm7b5, F6/9 or A#/Dadd13, in a single pass
+    and raises ValueError if it is not valid. Recently parsed symbols are
+    cached, so parsing them again is cheap. Symbols with a different spelling
+    of the same chord are equal, but keep their own tokens."""
+    n = len(symbol)
+    if not n or symbol[0] not in NOTE_LETTERS:
+        raise ValueError(f'Invalid chord symbol: {symbol!r}')
+
+    i = 1
+    while i < n and symbol[i] in '#b':
+        i += 1
+    root = symbol[:i]
+    tokens = list(root)
+
+    quality = ''
+    for spelling, canonical in QUALITY_STARTS.get(symbol[i : i + 1], ()):
+        if symbol.startswith(spelling, i):
+            quality = canonical
+            tokens.append(spelling)
+            i += len(spelling)
+            break
+
+    number = ''
+    extensions, alterations = [], []
+    while i < n and symbol[i] != '/':
+        c = symbol[i]
+        spelling, word = MODIFIER_STARTS.get(c, ('', ''))
+        if spelling and not symbol.startswith(spelling, i):
+            spelling = word = ''
+        j = i + (len(spelling) or c in '#b')
+        start = j
+        while j < n and symbol[j].isdigit():
+            j += 1
+        digits = symbol[start:j]
+
+        # A major seventh is only added to other qualities, before any number
+        if word == 'maj' and (quality == 'maj' or number):
+            word = ''
+        if word and digits in DEGREES[word]:
+            extensions.append(word + digits)
+            tokens += [spelling, digits] if digits else [spelling]
+        elif c in '#b' and digits in DEGREES[c]:
+            alterations.append(c + digits)
+            tokens += [c, digits]
+        elif (
+            not spelling
+            and digits in CHORD_NUMBERS
+            and not (number or extensions or alterations)
+        ):
+            number = digits
+            tokens.append(digits)
+            # Sixth chords with an added ninth are written with a slash
+            if digits == '6' and symbol.startswith('/9', j):
+                number = '6/9'
+                tokens += ['/', '9']
+                j += 2
+        else:
+            raise ValueError(f'Invalid chord symbol: {symbol!r}')
+        i = j
+
+    bass = None
+    if i < n:
+        try:
+            bass = parse_chord_symbol(symbol[i + 1 :])
+        except ValueError:
+            raise ValueError(f'Invalid chord symbol: {symbol!r}') from None
+        if bass.bass:
+            raise ValueError(f'Invalid chord symbol: {symbol!r}')
+        tokens += ['/', *bass.tokens]
+
+    if len(set(extensions)) < len(extensions):
+        raise ValueError(f'Invalid chord symbol: {symbol!r}')
+    if len(set(alterations)) < len(alterations):
+        raise ValueError(f'Invalid chord symbol: {symbol!r}')
+    # Without a seventh or a higher number, major is the same as no quality
+    if quality == 'maj' and number not in DEGREES['maj']:
+        quality = ''
+    if len(extensions) > 1:
+        extensions.sort()
+    if len(alterations) > 1:
+        alterations.sort(key=lambda a: (int(a[1:]), a[0]))
+    extensions = ((number,) if number else ()) + tuple(extensions)
+    alterations = tuple(alterations)
+    return ChordSymbol(root, quality, extensions, alterations, bass, tuple(tokens))
+
+
+class Chord:
+    def __init__(self, name, diagram='', fingering='', notes='', degrees=''):
+        """Initializes a chord with its name, diagram, fingering, notes, and
+        degrees. The diagram, fingering, notes and degrees are space-separated
+        strings, with unused strings represented by 'x' in all cases.
+        """
+        self.name = name
+        self.symbol = parse_chord_symbol(name)
+        self.diagram = [None if d == 'x' else int(d) for d in diagram.split()]
+        self.fingering = [None if f == 'x' else int(f) for f in fingering.split()]
+        self.notes = notes.split()
+        self.degrees = degrees.split()
+
+        lengths = {
+            len(self.diagram),
+            len(self.fingering),
+            len(self.notes),
+            len(self.degrees),
+        }
+        assert len(lengths) == 1 or len(lengths - {0}) == 1
+
+    def __repr__(self):
+        return f'{self.name}({self.diagram}, {self.fingering})'
+
+    def __eq__(self, other):
+        if not isinstance(other, Chord):
+            return False
+        equal = self.symbol == other.symbol
+        if self.diagram != [] and other.diagram != []:
+            equal = equal and self.diagram == other.diagram
+        if self.fingering != [] and other.fingering != []:
+            equal = equal and self.fingering == other.fingering
+        return equal
+
+
+def load_chords(filename) -> list[Chord]:
+    """Loads chords from a CSV file and raises ValueError with the line number
+    if a chord name is not a valid chord symbol."""
+    chords = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        next(f)
+        for line_number, line in enumerate(f, start=2):
+            args = line.strip().split(',')
+            try:
+                chords.append(Chord(*args))
+            except ValueError as e:
+                raise ValueError(f'{filename}, line {line_number}: {e}') from e
+    return chords
+
+
+def first_fret(diagram):
+    """Returns the fret at the top of a diagram, 1 if all notes fit under the
+    nut, otherwise the lowest fretted note."""
+    frets = [f for f in diagram if f]
+    if not frets or max(frets) <= DIAGRAM_FRETS:
+        return 1
+    return min(frets)
+
+
+def text_diagram(chord: Chord, show_fingering=False, show_name=True) -> list[str]:
+    """Draws the chord diagram with box-drawing characters and returns its
+    lines. Strings are vertical, the nut is drawn with a double line or the
+    first fret is written left of the diagram. Notes are written as finger
+    numbers or dots, and barres connect notes played by the same finger."""
+    num_strings = len(chord.diagram)
+    top = first_fret(chord.diagram)
+    fingering = chord.fingering or [None] * num_strings
+
+    # Barres span from the first to the last string played by a finger
+    barres = {}
+    for string, (fret, finger) in enumerate(zip(chord.diagram, fingering)):
+        if fret and finger:
+            start, _ = barres.get(finger, (string, string))
+            barres[finger] = start, string
+    spans = [
+        (chord.diagram[start], start, end)
+        for start, end in barres.values()
+        if start < end
+    ]
+
+    lines = []
+    if show_name:
+        lines.append(chord.name.center(2 * num_strings - 1).rstrip())
+    lines.append(
+        ' '.join('x' if f is None else 'o' if f == 0 else ' ' for f in chord.diagram)
+    )
+    if top == 1:
+        lines.append('╒' + '═╤' * (num_strings - 2) + '═╕')
+    else:
+        lines.append('┌' + '─┬' * (num_strings - 2) + '─┐')
+
+    for row in range(DIAGRAM_FRETS):
+        fret = top + row
+        covered = [
+            any(f == fret and start <= s <= end for f, start, end in spans)
+            for s in range(num_strings)
+        ]
+        cells = []
+        for string, (f, finger) in enumerate(zip(chord.diagram, fingering)):
+            barre = barres.get(finger)
+            if f == fret and (barre is None or string in barre):
+                cells.append(str(finger) if show_fingering and finger else '●')
+            else:
+                cells.append('━' if covered[string] else '│')
+            if string < num_strings - 1:
+                inside = covered[string] and covered[string + 1]
+                cells.append('━' if inside else ' ')
+        lines.append(''.join(cells))
+
+        left, middle, right = '├┼┤' if row < DIAGRAM_FRETS - 1 else '└┴┘'
+        lines.append(left + ('─' + middle) * (num_strings - 2) + '─' + right)
+
+    # The fret number is written next to the top fret if the nut is not shown
+    label = f'{top} ' if top > 1 else ''
+    fret_row = len(lines) - 2 * DIAGRAM_FRETS
+    return [
+        (label if i == fret_row else ' ' * len(label)) + line
+        for i, line in enumerate(lines)
+    ]
+
+
+def side_by_side(diagrams, gap=4) -> list[str]:
+    """Joins lines of diagrams so that they are printed next to each other."""
+    height = max(len(lines) for lines in diagrams)
+    widths = [max(len(line) for line in lines) for lines in diagrams]
+    rows = []
+    for i in range(height):
+        cells = [
+            (lines[i] if i < len(lines) else '').ljust(width)
+            for lines, width in zip(diagrams, widths)
+        ]
+        rows.append((' ' * gap).join(cells).rstrip())
+    return rows
@@ -1,12 +1,16 @@
 #!/bin/bash
 
 . .venv/bin/activate
-email=$(git config user.email)
+
+if [[ "$1" == "--combined" ]]; then
+    python build_decks.py --combined
+    exit
+fi
 
 for deck in decks/*.py; do
     echo "Running $(basename "$deck")"
     module=$(echo "$deck" | sed 's/\//./g' | sed 's/\.py$//')
-    ANKI_BOT_EMAIL=$email python -m "$module"
+    python -m "$module"
 
     if [[ "$deck" == "decks/guitar_chord_notes.py" ]]; then
         echo "Running guitar_chord_notes.py for ukulele"
@@ -6,32 +6,52 @@ Creates an Anki deck for learning the circle of fifths:
     - Reading key signatures.
     - Perfect 4ths and 5ths between keys.
     - Accidentals in each key.
+
+Usage:
+    python -m decks.circle_of_fifths [--clefs clef,...]
+
+Key signatures are rendered locally for each clef (treble, bass or alto, by
+default only treble) and cached in the .cache directory.
 """
 
-import shutil
-import urllib.request
-from os import environ, mkdir, path, remove, rmdir
+from os import makedirs, mkdir, path
+from sys import argv
 
 import genanki
-from bs4 import BeautifulSoup
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
-from utils import card_model, note_to_latex
+from cache import atomic_write
+from package_writer import write_package
+from utils import CLEF_OFFSETS, card_model, key_signature, note_to_latex
 
-EMAIL = environ.get('ANKI_BOT_EMAIL', '').strip()
-USER_AGENT = f'MusicAnkiBot/1.0 ({EMAIL})'
-TEMP_DIR = 'temp_circle_of_fifths'
+CACHE_DIR = path.join('.cache', 'key_signatures')
 OUTPUT_DIR = 'out'
 
+# Bump when the key signature drawing changes to invalidate cached images
+KEY_SIGNATURE_VERSION = 1
+
 
 def main():
-    if not EMAIL:
-        print('Email must be set to enable remote downloads.')
-        exit(1)
+    clefs = ['treble']
+    for i, arg in enumerate(argv):
+        if arg == '--clefs' and i + 1 < len(argv):
+            clefs = argv[i + 1].split(',')
+    for clef in clefs:
+        if clef not in CLEF_OFFSETS:
+            print(f'Unknown clef: {clef}')
+            exit(1)
+
     if not path.exists(OUTPUT_DIR):
         mkdir(OUTPUT_DIR)
-    if not path.exists(TEMP_DIR):
-        mkdir(TEMP_DIR)
 
+    deck, media_files = build_deck(clefs)
+    write_package(deck, path.join(OUTPUT_DIR, 'circle_of_fifths.apkg'), media_files)
+
+
+def build_deck(clefs=('treble',)):
+    """Creates the deck and returns it together with the key signature images
+    of the given clefs."""
     majors = 'C G D A E B F# C# Cb Gb Db Ab Eb Bb F'.split()
     minors = 'a e b f# c# g# d# a# ab eb bb f c g d'.split()
     accidentals = '0_ 1# 2# 3# 4# 5# 6# 7# 7b 6b 5b 4b 3b 2b 1b'.split()
@@ -80,17 +100,18 @@ def main():
         deck.add_note(note)
 
         # Reading key signatures
-        filename = download_key_signature(maj)
-        media_files.append(path.join(TEMP_DIR, filename))
-        note = genanki.Note(
-            model=card_model,
-            fields=[
-                f'<img class="key-img" src="{filename}" {img_css}><br>'
-                'Name major/minor key signature.',
-                f'{maj_tex} / {min_tex}',
-            ],
-        )
-        deck.add_note(note)
+        for clef in clefs:
+            filepath = render_key_signature(sharps, flats, clef)
+            media_files.append(filepath)
+            note = genanki.Note(
+                model=card_model,
+                fields=[
+                    f'<img class="key-img" src="{path.basename(filepath)}" '
+                    f'{img_css}><br>Name major/minor key signature.',
+                    f'{maj_tex} / {min_tex}',
+                ],
+            )
+            deck.add_note(note)
 
         # Accidentals in each key
         acc_notes = []
@@ -123,49 +144,31 @@ def main():
         )
         deck.add_note(note)
 
-    package = genanki.Package(deck)
-    package.media_files = media_files
-    package.write_to_file(path.join(OUTPUT_DIR, 'circle_of_fifths.apkg'))
-
-    for filename in media_files:
-        remove(filename)
-    rmdir(TEMP_DIR)
-
-
-def note_to_filename(note):
-    """Convert key signature into a filename for key signature images."""
-    # Currently, the C# key file is named differently
-    if note == 'C#':
-        return 'Key_Signature_of_C-sharp_major.jpg'
-
-    quality = 'major' if note[0].isupper() else 'minor'
-    key = note[0].upper()
-    if len(note) == 2:
-        key += '-sharp' if note[1] == '#' else '-flat'
-    filename = f'Key_Signature_{key}_{quality}.jpg'
-    return filename
-
-
-def download_key_signature(note):
-    # Download Wikipedia web page to find the image URL
-    filename = note_to_filename(note)
-    url = 'https://en.wikipedia.org/wiki/File:' + filename
-    req = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
-    html = urllib.request.urlopen(req).read()
-    soup = BeautifulSoup(html, 'html.parser')
-
-    img_element = soup.select_one(f'img[src$="{filename}"]')
-    if img_element is None:
-        raise ValueError(f'Image for {note} not found on Wikipedia.')
-    img_url = 'https:' + img_element['src']
-    req = urllib.request.Request(img_url, headers={'User-Agent': USER_AGENT})
-    with (
-        urllib.request.urlopen(req) as response,
-        open(path.join(TEMP_DIR, filename), 'wb') as out_file,
-    ):
-        shutil.copyfileobj(response, out_file)
-
-    return filename
+    return deck, media_files
+
+
+def render_key_signature(sharps, flats, clef='treble'):
+    """Renders the key signature into the cache directory, unless it has
+    already been rendered, and returns the path of the image."""
+    accidentals = 'natural'
+    if sharps:
+        accidentals = f'{sharps}_sharps'
+    elif flats:
+        accidentals = f'{flats}_flats'
+    filename = f'key_signature_{clef}_{accidentals}.png'
+    version_dir = path.join(CACHE_DIR, f'v{KEY_SIGNATURE_VERSION}')
+    filepath = path.join(version_dir, filename)
+    if path.exists(filepath):
+        return filepath
+
+    makedirs(version_dir, exist_ok=True)
+    fig = Figure(figsize=(5.2, 4.1))
+    FigureCanvasAgg(fig)
+    key_signature(fig.add_axes([0, 0, 1, 1]), sharps, flats, clef)
+    # Without metadata, the images only depend on the drawing
+    with atomic_write(filepath) as temp_path:
+        fig.savefig(temp_path, metadata={'Software': None})
+    return filepath
 
 
 if __name__ == '__main__':
@@ -0,0 +1,226 @@
+"""
+Creates an Anki deck for learning note locations on the fretboard:
+    - Naming the note at a marked position.
+    - Finding all positions of a note on a string.
+
+Tunings are given as names from utils.TUNINGS or as space-separated notes with
+octaves, from the lowest to the highest string.
+
+Usage:
+    python -m decks.fretboard_notes [tuning ...] [--frets num]
+
+Examples:
+    python -m decks.fretboard_notes
+    python -m decks.fretboard_notes standard drop-d ukulele --frets 15
+    python -m decks.fretboard_notes "B1 E2 A2 D3 G3 B3 E4"
+
+The blank neck is drawn only once for each tuning and the note markers are
+blended into copies of its pixel buffer, so cards are cheap to render. Images
+only contain shades of gray and are saved with a single channel.
+"""
+
+import zlib
+from os import mkdir, path, remove, rmdir
+from sys import argv
+
+import genanki
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import Circle
+from PIL import Image
+
+from package_writer import write_package
+from utils import NOTE_NAMES, TUNINGS, card_model, note_to_latex, pitch_matrix
+
+TEMP_DIR = 'temp_fretboard_notes'
+OUTPUT_DIR = 'out'
+
+DECK_ID = 1795330417
+INLAYS = [3, 5, 7, 9, 15, 17, 19, 21]
+DOUBLE_INLAYS = [12, 24]
+MARKER_RADIUS = 0.32
+
+
+def main():
+    tunings = [arg for arg in argv[1:] if not arg.startswith('-')]
+    num_frets = 24
+    for i, arg in enumerate(argv):
+        if arg == '--frets' and i + 1 < len(argv):
+            num_frets = int(argv[i + 1])
+            tunings.remove(argv[i + 1])
+    tunings = tunings or ['standard']
+
+    if not path.exists(OUTPUT_DIR):
+        mkdir(OUTPUT_DIR)
+    if not path.exists(TEMP_DIR):
+        mkdir(TEMP_DIR)
+
+    decks = []
+    media_files = []
+    try:
+        for tuning in tunings:
+            deck, files = tuning_deck(tuning, num_frets, TEMP_DIR)
+            decks.append(deck)
+            media_files += files
+    except ValueError as e:
+        print(e)
+        exit(1)
+
+    write_package(decks, path.join(OUTPUT_DIR, 'fretboard_notes.apkg'), media_files)
+
+    for filename in media_files:
+        remove(filename)
+    rmdir(TEMP_DIR)
+
+
+def tuning_deck(tuning, num_frets, media_dir):
+    """Creates a subdeck of cards for a single tuning and renders its media
+    files into the media directory. Tunings without spaces are names, since
+    custom tunings have more than one string."""
+    if ' ' not in tuning and tuning not in TUNINGS:
+        names = ', '.join(TUNINGS)
+        raise ValueError(f'Unknown tuning: {tuning}, use one of {names}.')
+    name = tuning if tuning in TUNINGS else 'custom ' + tuning.replace(' ', '-')
+    tuning = TUNINGS.get(tuning, tuning)
+    pitches = pitch_matrix(tuning, num_frets)
+    num_strings = len(pitches)
+
+    # Deck IDs must be stable between builds, so they are derived from names
+    deck_id = DECK_ID + zlib.crc32(name.encode()) % 10**6
+    deck_name = name.replace('-', ' ').title()
+    deck = genanki.Deck(deck_id, f'Music::Fretboard Notes::{deck_name}')
+    prefix = 'fretboard_' + name.replace(' ', '_').replace('#', 's')
+
+    neck = FretboardNeck(num_strings, num_frets)
+    img_css = 'style="max-width: 100%;"'
+    media_files = []
+
+    for string, row in enumerate(pitches):
+        # Strings are numbered from the highest one
+        number = num_strings - string
+        string_name = NOTE_NAMES[row[0] % 12][0]
+        string_tex = f'string {number} ({note_to_latex(string_name)})'
+
+        # Which note is at the marked position?
+        for fret, pitch in enumerate(row):
+            filename = f'{prefix}_{number}_{fret}.png'
+            filepath = path.join(media_dir, filename)
+            neck.save(filepath, [(string, fret)])
+            media_files.append(filepath)
+
+            answer = ' / '.join(note_to_latex(n) for n in NOTE_NAMES[pitch % 12])
+            note = genanki.Note(
+                model=card_model,
+                fields=[
+                    f'<img src="{filename}" {img_css}><br>Name the marked note.',
+                    answer,
+                ],
+            )
+            deck.add_note(note)
+
+        # Where is the note on the string?
+        for pitch_class, names in enumerate(NOTE_NAMES):
+            frets = np.flatnonzero(row % 12 == pitch_class)
+            if len(frets) == 0:
+                continue
+            filename = f'{prefix}_{number}_note{pitch_class}.png'
+            filepath = path.join(media_dir, filename)
+            neck.save(filepath, [(string, f) for f in frets])
+            media_files.append(filepath)
+
+            note_tex = ' / '.join(note_to_latex(n) for n in names)
+            frets_text = ', '.join(str(f) for f in frets)
+            note = genanki.Note(
+                model=card_model,
+                fields=[
+                    f'Where is {note_tex} on {string_tex}?',
+                    f'<img src="{filename}" {img_css}><br>Frets: {frets_text}',
+                ],
+            )
+            deck.add_note(note)
+
+    return deck, media_files
+
+
+class FretboardNeck:
+    def __init__(self, num_strings, num_frets):
+        """Renders a blank neck once and precomputes the pixel positions of
+        all strings and frets, together with an anti-aliased marker sprite."""
+        fig = Figure(figsize=(0.5 * (num_frets + 1.6), 0.5 * (num_strings + 1)))
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_axes([0, 0, 1, 1])
+        blank_neck(ax, num_strings, num_frets)
+        canvas.draw()
+        self.background = np.asarray(canvas.buffer_rgba())[..., 0].copy()
+
+        # Markers are centered between frets, open strings left of the nut
+        xs = np.arange(num_frets + 1) - 0.5
+        ys = np.arange(num_strings)
+        grid = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+        pixels = ax.transData.transform(grid).reshape(num_strings, num_frets + 1, 2)
+        height = self.background.shape[0]
+        self.centers = np.stack([height - pixels[..., 1], pixels[..., 0]], axis=-1)
+
+        radius = MARKER_RADIUS * (pixels[0, 1, 0] - pixels[0, 0, 0])
+        self.sprite = marker_sprite(radius)
+
+    def render(self, positions):
+        """Returns a copy of the background with markers at the given (string,
+        fret) positions."""
+        image = self.background.copy()
+        alpha = self.sprite
+        size = len(alpha)
+        for string, fret in positions:
+            row, col = np.round(self.centers[string, fret]).astype(int) - size // 2
+            region = image[row : row + size, col : col + size]
+            a = alpha[: region.shape[0], : region.shape[1]]
+            region[...] = (region * (1 - a)).astype(np.uint8)
+        return image
+
+    def save(self, filepath, positions):
+        Image.fromarray(self.render(positions)).save(filepath)
+
+
+def marker_sprite(radius):
+    """Returns the alpha mask of a filled circle with anti-aliased edges."""
+    size = int(np.ceil(2 * radius)) + 2
+    center = (size - 1) / 2
+    y, x = np.mgrid[:size, :size]
+    dist = np.hypot(x - center, y - center)
+    return np.clip(radius + 0.5 - dist, 0, 1)
+
+
+def blank_neck(ax, num_strings, num_frets):
+    """Draws a horizontal neck with the lowest string at the bottom, the nut on
+    the left and the inlays between frets."""
+    top = num_strings - 1
+
+    for fret in range(num_frets + 1):
+        lw = 4 if fret == 0 else 1.5
+        ax.add_line(Line2D([fret, fret], [0, top], color='black', lw=lw))
+    for string in range(num_strings):
+        ax.add_line(Line2D([0, num_frets], [string, string], color='black', lw=1))
+
+    inlay = {'radius': 0.15, 'color': 'lightgray', 'zorder': 0}
+    for fret in INLAYS + DOUBLE_INLAYS:
+        if fret > num_frets:
+            continue
+        x = fret - 0.5
+        if fret in DOUBLE_INLAYS and num_strings > 2:
+            ax.add_patch(Circle((x, top / 2 - 1), **inlay))
+            ax.add_patch(Circle((x, top / 2 + 1), **inlay))
+        else:
+            ax.add_patch(Circle((x, top / 2), **inlay))
+        kwargs = {'fontsize': 12, 'ha': 'center', 'va': 'center', 'color': 'gray'}
+        ax.text(x, -0.7, str(fret), **kwargs)
+
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_xlim(-1.1, num_frets + 0.5)
+    ax.set_ylim(-1.2, top + 0.8)
+    ax.axis('off')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,47 @@
 """
 Creates an Anki deck for naming notes and their scale degrees in guitar chords.
+
+Usage:
+    python -m decks.guitar_chord_notes [ukulele] [options]
+
+Arguments:
+    --atlas: draw all chord diagrams into one large figure and slice them out
+    --benchmark: time rendering of the diagrams per chord and in the atlas
+    --no-audio: do not add synthesized audio of the chords to the cards
+
+By default, diagrams are rendered one by one on a reused figure. In the atlas
+mode, the figure is rasterized once per page of diagrams and each diagram is
+cropped from the pixel buffer to its tight bounding box, giving images of the
+same size. Creating the axes of every tile costs about as much as saving a
+figure per chord, so neither mode is clearly faster.
+
+Audio clips of the strummed chords are synthesized in the instrument tuning
+and cached in the .cache directory.
 """
 
-from os import mkdir, path, remove, rmdir
+from math import ceil
+from os import mkdir, path
+from shutil import rmtree
 from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
 
 import genanki
-import matplotlib.pyplot as plt
-
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from audio import chord_clips
+from chords import load_chords
+from package_writer import write_package
 from utils import (
+    DiagramRenderer,
     card_model,
     chord_diagram,
     chord_to_latex,
     degree_to_latex,
-    load_chords,
     note_to_latex,
 )
 
@@ -22,6 +50,17 @@ UKULELE_CHORDS = path.join('data', 'ukulele_chords.csv')
 TEMP_DIR = 'temp_guitar_chord_notes'
 OUTPUT_DIR = 'out'
 
+INSTRUMENTS = {
+    'guitar': (GUITAR_CHORDS, 'standard', 1541482719, 'Music::Guitar Chord Notes'),
+    'ukulele': (UKULELE_CHORDS, 'ukulele', 1440356293, 'Music::Ukulele Chord Notes'),
+}
+
+TILE_SIZE = 4, 6
+ATLAS_COLUMNS = 8
+ATLAS_ROWS = 8
+# Same padding as bbox_inches='tight' at the default 100 DPI
+TRIM_PADDING = 10
+
 
 def main():
     if not path.exists(OUTPUT_DIR):
@@ -29,44 +68,83 @@ def main():
     if not path.exists(TEMP_DIR):
         mkdir(TEMP_DIR)
 
-    if len(argv) > 1 and argv[1] == 'ukulele':
-        chords = load_chords(UKULELE_CHORDS)
-        deck = genanki.Deck(1440356293, 'Music::Ukulele Chord Notes')
-        out_file = path.join(OUTPUT_DIR, 'ukulele_chord_notes.apkg')
-        prefix = 'ukulele'
-    else:
-        chords = load_chords(GUITAR_CHORDS)
-        deck = genanki.Deck(1541482719, 'Music::Guitar Chord Notes')
-        out_file = path.join(OUTPUT_DIR, 'guitar_chord_notes.apkg')
-        prefix = 'guitar'
-
-    # Remove duplicate chords with different fingerings
+    instrument = 'ukulele' if len(argv) > 1 and argv[1] == 'ukulele' else 'guitar'
+    atlas = '--atlas' in argv
+    audio = '--no-audio' not in argv
+
+    deck, media_files = build_deck(instrument, TEMP_DIR, atlas, audio)
+    if '--benchmark' in argv:
+        benchmark(instrument_chords(instrument))
+
+    out_file = path.join(OUTPUT_DIR, f'{instrument}_chord_notes.apkg')
+    write_package(deck, out_file, media_files)
+    rmtree(TEMP_DIR)
+
+
+def benchmark(chords):
+    """Times only rendering of the diagrams, per chord and in the atlas."""
+    times = {}
+    for render in [render_chords, render_atlas]:
+        with TemporaryDirectory() as temp_dir:
+            filepaths = [
+                path.join(temp_dir, chord_filename('benchmark', chord))
+                for chord in chords
+            ]
+            start = perf_counter()
+            render(chords, filepaths)
+            times[render] = perf_counter() - start
+
+    chords_time, atlas_time = times[render_chords], times[render_atlas]
+    print(
+        f'Rendered {len(chords)} diagrams: per chord {chords_time:.2f} s, '
+        f'atlas {atlas_time:.2f} s, speedup {chords_time / atlas_time:.1f}x'
+    )
+
+
+def instrument_chords(instrument):
+    """Loads chords of the instrument without duplicate diagrams, which only
+    differ in fingering."""
+    chords_file, *_ = INSTRUMENTS[instrument]
     chords = {
         ' '.join(str(d) if d is not None else 'x' for d in chord.diagram): chord
-        for chord in chords
+        for chord in load_chords(chords_file)
     }
-    chords = list(chords.values())
+    return list(chords.values())
+
+
+def build_deck(instrument, media_dir, atlas=False, audio=True, reuse=False):
+    """Creates the deck of the instrument and renders its chord diagrams into
+    the media directory. Audio clips are taken from the cache. With reuse,
+    diagrams already in the media directory are not rendered again."""
+    _, tuning, deck_id, deck_name = INSTRUMENTS[instrument]
+    deck = genanki.Deck(deck_id, deck_name)
+
+    chords = instrument_chords(instrument)
+    filenames = [chord_filename(instrument, chord) for chord in chords]
+    media_files = [path.join(media_dir, filename) for filename in filenames]
+    missing = [
+        (chord, filepath)
+        for chord, filepath in zip(chords, media_files)
+        if not reuse or not path.exists(filepath)
+    ]
+    if missing:
+        (render_atlas if atlas else render_chords)(*map(list, zip(*missing)))
+
+    clips = [None] * len(chords)
+    if audio:
+        clips = chord_clips(tuning, [chord.diagram for chord in chords])
+        media_files += clips
 
-    media_files = []
     table_style = 'style="margin-left: auto; margin-right: auto; padding: 10px;"'
 
-    for chord in chords:
+    for chord, filename, clip in zip(chords, filenames, clips):
         notes_table = f'<table {table_style}>'
         for row, f in [(chord.notes, note_to_latex), (chord.degrees, degree_to_latex)]:
             r = ''.join(f'<td>{f(note)}</td>' for note in row if note != 'x')
             notes_table += f'<tr>{r}</tr>'
         notes_table += '</table>'
-
-        fig, ax = plt.subplots(figsize=(4, 6))
-        chord_diagram(chord, ax, show_name=False)
-        name = chord.name.replace('/', '_')
-        diagram = ''.join(str(d) if d is not None else 'x' for d in chord.diagram)
-        filename = f'{prefix}_{name}_{diagram}.png'
-        filepath = path.join(TEMP_DIR, filename)
-        plt.savefig(filepath, bbox_inches='tight')
-        plt.close()
-
-        media_files.append(filepath)
+        if clip:
+            notes_table += f'[sound:{path.basename(clip)}]'
 
         note = genanki.Note(
             model=card_model,
@@ -77,13 +155,69 @@ def main():
         )
         deck.add_note(note)
 
-    package = genanki.Package(deck)
-    package.media_files = media_files
-    package.write_to_file(out_file)
-
-    for file in media_files:
-        remove(file)
-    rmdir(TEMP_DIR)
+    return deck, media_files
+
+
+def chord_filename(prefix, chord):
+    name = chord.name.replace('/', '_')
+    diagram = ''.join(str(d) if d is not None else 'x' for d in chord.diagram)
+    return f'{prefix}_{name}_{diagram}.png'
+
+
+def render_chords(chords, filepaths):
+    """Renders each chord diagram separately, reusing a single figure."""
+    renderer = DiagramRenderer(TILE_SIZE)
+    for chord, filepath in zip(chords, filepaths):
+        renderer.save(chord, filepath, show_name=False)
+
+
+def render_atlas(chords, filepaths):
+    """Renders chord diagrams as a grid of tiles in one figure per page and
+    slices the tiles out of the rasterized figure. Axes are placed within
+    each tile the same as in a figure with a single diagram."""
+    width, height = TILE_SIZE
+    params = matplotlib.rcParams
+    left, bottom = params['figure.subplot.left'], params['figure.subplot.bottom']
+    ax_width = params['figure.subplot.right'] - left
+    ax_height = params['figure.subplot.top'] - bottom
+
+    per_page = ATLAS_COLUMNS * ATLAS_ROWS
+    for page in range(0, len(chords), per_page):
+        page_chords = chords[page : page + per_page]
+        rows = ceil(len(page_chords) / ATLAS_COLUMNS)
+        fig = Figure(figsize=(width * ATLAS_COLUMNS, height * rows))
+        canvas = FigureCanvasAgg(fig)
+
+        for i, chord in enumerate(page_chords):
+            row, col = divmod(i, ATLAS_COLUMNS)
+            rect = [
+                (col + left) / ATLAS_COLUMNS,
+                (rows - 1 - row + bottom) / rows,
+                ax_width / ATLAS_COLUMNS,
+                ax_height / rows,
+            ]
+            chord_diagram(chord, fig.add_axes(rect), show_name=False)
+
+        canvas.draw()
+        renderer = canvas.get_renderer()
+        pixels = np.asarray(canvas.buffer_rgba())
+        for ax, filepath in zip(fig.axes, filepaths[page : page + per_page]):
+            tile = crop(pixels, ax.get_tightbbox(renderer), TRIM_PADDING)
+            # Diagrams are black and white, a single channel is enough
+            Image.fromarray(tile[..., 0]).save(filepath)
+
+
+def crop(pixels, bbox, padding):
+    """Crops the region of the bounding box in display coordinates, which
+    start at the bottom left, from the pixel buffer, which starts at the top
+    left. The size of the region is truncated to whole pixels the same as
+    with bbox_inches='tight', and the region is clamped to the buffer."""
+    height, width = pixels.shape[:2]
+    top = int(height - bbox.y1 - padding)
+    left = int(bbox.x0 - padding)
+    bottom = min(top + int(bbox.height + 2 * padding), height)
+    right = min(left + int(bbox.width + 2 * padding), width)
+    return pixels[max(top, 0) : bottom, max(left, 0) : right]
 
 
 if __name__ == '__main__':
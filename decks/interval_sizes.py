@@ -4,12 +4,17 @@ from os import path
 
 import genanki
 
+from package_writer import write_package
 from utils import card_model
 
 OUTPUT_DIR = 'out'
 
 
 def main():
+    write_package(build_deck(), path.join(OUTPUT_DIR, 'interval_sizes.apkg'))
+
+
+def build_deck():
     intervals = {
         1: ('perfect', 0),
         2: ('major', 2),
@@ -57,8 +62,7 @@ def main():
         )
         deck.add_note(note)
 
-    package = genanki.Package(deck)
-    package.write_to_file(path.join(OUTPUT_DIR, 'interval_sizes.apkg'))
+    return deck
 
 
 if __name__ == '__main__':
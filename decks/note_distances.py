@@ -7,12 +7,17 @@ from os import path
 
 import genanki
 
+from package_writer import write_package
 from utils import card_model
 
 OUTPUT_DIR = 'out'
 
 
 def main():
+    write_package(build_deck(), path.join(OUTPUT_DIR, 'note_distances.apkg'))
+
+
+def build_deck():
     deck = genanki.Deck(1312897177, 'Music::Note Distances')
     notes = 'CDEFGAB'
 
@@ -32,8 +37,7 @@ def main():
             )
             deck.add_note(note)
 
-    package = genanki.Package(deck)
-    package.write_to_file(path.join(OUTPUT_DIR, 'note_distances.apkg'))
+    return deck
 
 
 if __name__ == '__main__':
@@ -0,0 +1,215 @@
+"""Writes Anki packages for large decks in bulk.
+
+The collection is built in an in-memory SQLite database, with all notes and
+cards inserted by executemany() in a single transaction, and the package is
+written in one pass without a temporary collection file. The output matches
+genanki.Package.write_to_file() for the same decks, media and timestamp.
+
+Several packages can be combined into one with merge_media(), which keeps a
+single copy of media files with equal contents and returns copies of the
+decks with references to the kept files.
+"""
+
+import copy
+import hashlib
+import itertools
+import json
+import re
+import sqlite3
+import time
+import zipfile
+from os import path
+
+import genanki
+import numpy as np
+from genanki.apkg_col import APKG_COL
+from genanki.apkg_schema import APKG_SCHEMA
+from genanki.util import BASE91_TABLE
+
+BASE91 = np.frombuffer(''.join(BASE91_TABLE).encode(), dtype=np.uint8)
+GUID_DIGITS = 10
+# Media are referenced from fields by images and sounds
+MEDIA_REFERENCE = r'(?<=src=")({})(?=")|(?<=\[sound:)({})(?=\])'
+
+
+def guids_for(notes_fields) -> list[str]:
+    """Same as genanki.guid_for() for the fields of many notes at once. The
+    conversion of hashes into base 91 digits is vectorized over all notes."""
+    hashes = b''.join(
+        hashlib.sha256('__'.join(fields).encode('utf-8')).digest()[:8]
+        for fields in notes_fields
+    )
+    values = np.frombuffer(hashes, dtype='>u8').astype(np.uint64)
+    digits = np.empty((len(values), GUID_DIGITS), dtype=np.uint8)
+    for i in reversed(range(GUID_DIGITS)):
+        values, digits[:, i] = np.divmod(values, 91)
+
+    # genanki omits leading zeros, which are encoded as 'a'
+    guids = BASE91[digits].view(f'S{GUID_DIGITS}').ravel()
+    return [guid.decode().lstrip('a') for guid in guids]
+
+
+def collection_rows(decks: list[genanki.Deck], timestamp, id_gen):
+    """Returns the decks and models JSON of the collection, and the rows of
+    the notes and cards tables. IDs are assigned in the same order as by
+    genanki, a note ID followed by the IDs of its cards."""
+    mod = int(timestamp)
+    decks_json, models_json = {}, {}
+    notes, cards = [], []
+
+    # Cards of a front/back note only depend on which of its fields are empty,
+    # cards of cloze notes depend on the cloze numbers in the fields
+    note_cards = {}
+
+    for deck in decks:
+        decks_json[str(deck.deck_id)] = deck.to_json()
+        models = dict(deck.models)
+        models.update((note.model.model_id, note.model) for note in deck.notes)
+        for model_id, model in models.items():
+            models_json[str(model_id)] = model.to_json(timestamp, deck.deck_id)
+
+        # The guid of genanki notes is only stored if it was set explicitly
+        guids = guids_for(note.fields for note in deck.notes)
+
+        for note, guid in zip(deck.notes, guids):
+            if len(note.fields) != len(note.model.fields):
+                raise ValueError(f'Number of fields does not match the model: {note}')
+            guid = note._guid or guid
+
+            if note.model.model_type == note.model.FRONT_BACK:
+                key = note.model.model_id, tuple(bool(f) for f in note.fields)
+                if key not in note_cards:
+                    note_cards[key] = card_rows(note)
+                note_card_rows = note_cards[key]
+            else:
+                note_card_rows = card_rows(note)
+
+            note_id = next(id_gen)
+            tags = ' ' + ' '.join(note.tags) + ' '
+            fields = '\x1f'.join(note.fields)
+            notes.append(
+                (note_id, guid, note.model.model_id, mod, -1, tags, fields)
+                + (note.sort_field, 0, 0, '')
+            )
+            for ord, queue in note_card_rows:
+                cards.append(
+                    (next(id_gen), note_id, deck.deck_id, ord, mod, -1, 0)
+                    + (queue, note.due, 0, 0, 0, 0, 0, 0, 0, 0, '')
+                )
+
+    return decks_json, models_json, notes, cards
+
+
+def card_rows(note: genanki.Note):
+    """Returns the template ordinal and the queue of each card of the note."""
+    return [(c.ord, -1 if c.suspend else 0) for c in note.cards]
+
+
+def build_collection(decks: list[genanki.Deck], timestamp) -> bytes:
+    """Builds the collection database in memory and returns its contents."""
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor()
+    cursor.executescript(APKG_SCHEMA)
+    cursor.executescript(APKG_COL)
+
+    id_gen = itertools.count(int(timestamp * 1000))
+    decks_json, models_json, notes, cards = collection_rows(decks, timestamp, id_gen)
+
+    col_decks, col_models = cursor.execute('SELECT decks, models FROM col').fetchone()
+    col_decks, col_models = json.loads(col_decks), json.loads(col_models)
+    col_decks.update(decks_json)
+    col_models.update(models_json)
+
+    with conn:
+        cursor.execute(
+            'UPDATE col SET decks = ?, models = ?',
+            (json.dumps(col_decks), json.dumps(col_models)),
+        )
+        cursor.executemany('INSERT INTO notes VALUES(?,?,?,?,?,?,?,?,?,?,?)', notes)
+        cursor.executemany(
+            'INSERT INTO cards VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)', cards
+        )
+
+    data = conn.serialize()
+    conn.close()
+    return data
+
+
+def merge_media(packages) -> tuple[list[genanki.Deck], dict[str, str]]:
+    """Merges media files of packages, given as pairs of decks and media files,
+    and returns all decks together with a mapping from media names to files.
+    Files with equal contents are only kept once and files with equal names
+    but different contents are renamed. References in note fields are
+    rewritten to the kept names on copies of the notes and decks, which keep
+    the guids of the original notes, so the given decks are left unchanged."""
+    merged, media, names = [], {}, {}
+
+    for decks, media_files in packages:
+        renames = {}
+        for filepath in media_files:
+            with open(filepath, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            name = path.basename(filepath)
+            if digest not in names:
+                kept = name
+                if kept in media:
+                    stem, ext = path.splitext(name)
+                    kept = f'{stem}_{digest[:8]}{ext}'
+                media[kept] = filepath
+                names[digest] = kept
+            if names[digest] != name:
+                renames[name] = names[digest]
+
+        if not renames:
+            merged.extend(decks)
+            continue
+        pattern = '|'.join(re.escape(name) for name in renames)
+        reference = re.compile(MEDIA_REFERENCE.format(pattern, pattern))
+        for deck in decks:
+            notes = []
+            for note in deck.notes:
+                fields = [
+                    reference.sub(lambda m, renames=renames: renames[m.group()], field)
+                    for field in note.fields
+                ]
+                notes.append(
+                    note if fields == note.fields else with_fields(note, fields)
+                )
+            deck = copy.copy(deck)
+            deck.notes = notes
+            merged.append(deck)
+
+    return merged, media
+
+
+def with_fields(note: genanki.Note, fields) -> genanki.Note:
+    """Returns a copy of the note with other fields and the same guid."""
+    copied = copy.copy(note)
+    copied.guid = note.guid
+    copied.fields = fields
+    # Cards are generated from the fields
+    copied.__dict__.pop('cards', None)
+    return copied
+
+
+def write_package(decks, file, media_files=(), timestamp=None):
+    """Writes the decks and media files into an Anki package. Decks can be a
+    single deck or a list of decks, as for genanki.Package. Media files are
+    either a list of paths or a mapping from media names to paths."""
+    if isinstance(decks, genanki.Deck):
+        decks = [decks]
+    if timestamp is None:
+        timestamp = time.time()
+    if isinstance(media_files, dict):
+        media_files = list(media_files.items())
+    else:
+        media_files = [(path.basename(filepath), filepath) for filepath in media_files]
+
+    collection = build_collection(decks, timestamp)
+    media = {str(i): name for i, (name, _) in enumerate(media_files)}
+
+    with zipfile.ZipFile(file, 'w') as package:
+        package.writestr('collection.anki2', collection)
+        package.writestr('media', json.dumps(media))
+        for i, (_, filepath) in enumerate(media_files):
+            package.write(filepath, str(i))
@@ -10,12 +10,15 @@ Examples:
     python practices/chord_changes.py my_chords.csv --chords 10 -n 4
     python practices/chord_changes.py --include data/bar_chords.csv
     python practices/chord_changes.py --include "F(1 3 3 2 1 1),B"
+    python practices/chord_changes.py --mode hardest -n 3
 
 Arguments:
     --chords num: number of chord samples, by default, all chords are used
     -n num: chord sample size, default is 2
     --include tag: include only chords in the specified tag file
     --exclude tag: exclude chords in the specified tag file
+    --mode mode: how chords are sampled, default is random
+    --text: display chord diagrams in the terminal
     --help: show script usage documentation
 
 Instead of a tag file, a comma-separated list of chords can be specified. If
@@ -23,6 +26,19 @@ multiple chords with the same name exist, using just a name corresponds to all
 of them. To specify a single ambiguous chord, the diagram can be written in
 the parentheses.
 
+Sampling modes:
+    random: chords are shuffled uniformly
+    hardest: samples with the most difficult chord changes come first
+    coverage: samples cover changes between as many pairs of chords as
+        possible, repeating chords as late as possible
+    weighted: chords are shuffled, preferring difficult changes
+
+Difficulty of chord changes is estimated from finger movement, barre changes
+and string changes, and cached per chord file in the .cache directory.
+
+In the text mode, diagrams are drawn with box-drawing characters and keys are
+read directly from the terminal, so the script also works over SSH.
+
 Keybindings:
     space: show next sample of chords
     q: quit the program
@@ -32,10 +48,8 @@ import sys
 from os import path
 from random import shuffle
 
-import matplotlib.pyplot as plt
-
 sys.path.append(path.join(path.dirname(path.abspath(__file__)), '..'))
-from utils import Chord, chord_diagram, load_chords
+from chords import Chord, load_chords, side_by_side, text_diagram
 
 GUITAR_CHORDS = path.join('data', 'guitar_chords.csv')
 UKULELE_CHORDS = path.join('data', 'ukulele_chords.csv')
@@ -45,32 +59,62 @@ def main():
     chords_file = GUITAR_CHORDS
     num_chords = None
     sample_size = 2
+    mode = 'random'
+    text = False
 
-    include, exclude = [], []
+    include, exclude = '', ''
 
     for i, arg in enumerate(sys.argv):
         if arg == '--chords' and i + 1 < len(sys.argv):
             num_chords = int(sys.argv[i + 1])
         elif arg == '-n' and i + 1 < len(sys.argv):
             sample_size = int(sys.argv[i + 1])
+        elif arg == '--mode' and i + 1 < len(sys.argv):
+            mode = sys.argv[i + 1]
+        elif arg == '--text':
+            text = True
         elif arg == '--help':
             print(__doc__, end='')
             exit(0)
         elif arg == '--include' and i + 1 < len(sys.argv):
-            include = parse_tag(sys.argv[i + 1])
+            include = sys.argv[i + 1]
         elif arg == '--exclude' and i + 1 < len(sys.argv):
-            exclude = parse_tag(sys.argv[i + 1])
+            exclude = sys.argv[i + 1]
         elif i == 1 and arg == 'ukulele':
             chords_file = UKULELE_CHORDS
         elif i == 1 and arg.endswith('.csv'):
             chords_file = arg
 
-    chords = load_chords(chords_file)
-    chords = filter_chords(chords, include, exclude)
+    # Transition costs need NumPy, which is only imported when used
+    if mode != 'random':
+        from transitions import SAMPLING_MODES
+
+        if mode not in SAMPLING_MODES:
+            print(f'Unknown sampling mode: {mode}')
+            exit(1)
+
+    try:
+        all_chords = load_chords(chords_file)
+        include = parse_tag(include) if include else []
+        exclude = parse_tag(exclude) if exclude else []
+    except ValueError as e:
+        print(e)
+        exit(1)
+    chords = filter_chords(all_chords, include, exclude)
     if num_chords is None:
         num_chords = len(chords)
 
-    samples = num_chords // sample_size
+    # Coverage sampling repeats chords, so samples are counted afterwards
+    chords = sample_chords(
+        chords_file, all_chords, chords, num_chords, mode, sample_size
+    )
+    samples = len(chords) // sample_size
+
+    if text:
+        run_text(chords, sample_size, samples)
+        return
+
+    import matplotlib.pyplot as plt
 
     plt.rcParams['toolbar'] = 'None'
     width = (3.3 if len(chords[0].diagram) == 6 else 2.5) * sample_size
@@ -81,8 +125,6 @@ def main():
 
     counter = fig.text(0.5, 0.07, '', fontsize=9, ha='center', va='center', alpha=0.5)
 
-    shuffle(chords)
-    chords = chords[:num_chords]
     i = 0
 
     def on_key(event):
@@ -92,7 +134,7 @@ def main():
             for j in range(sample_size):
                 ax[j].cla()
             render(chords, sample_size, i, samples, fig, ax, counter)
-            plt.draw()
+            fig.canvas.draw_idle()
 
     fig.canvas.mpl_connect('key_press_event', on_key)
 
@@ -105,15 +147,92 @@ def render(chords, sample_size, i, samples, fig, ax, counter):
     """Renders the i-th sample of chords, each onto a separate subplot in ax."""
     sampled_chords = chords[i * sample_size : (i + 1) * sample_size]
     if len(sampled_chords) < sample_size:
+        import matplotlib.pyplot as plt
+
         plt.close(fig)
 
+    from utils import chord_diagram
+
     for j, chord in enumerate(sampled_chords):
         chord_diagram(chord, ax[j], show_fingering=True)
     counter.set_text(f'{i + 1}/{samples}')
 
 
+def run_text(chords, sample_size, samples):
+    """Prints samples of chords in the terminal, showing the next one after
+    each space, until all samples are shown or q is pressed."""
+    clear = '\033[H\033[J' if sys.stdout.isatty() else ''
+    for i in range(samples):
+        sampled_chords = chords[i * sample_size : (i + 1) * sample_size]
+        if not sampled_chords:
+            break
+        lines = side_by_side(
+            [text_diagram(c, show_fingering=True) for c in sampled_chords]
+        )
+        width = max(len(line) for line in lines)
+        print(
+            clear + '\n'.join(lines),
+            f'{i + 1}/{samples}'.center(width).rstrip(),
+            sep='\n\n',
+        )
+
+        key = read_key()
+        while key not in (' ', 'q', '\x03', ''):
+            key = read_key()
+        if key != ' ':
+            break
+
+
+def read_key():
+    """Reads a single key press without waiting for enter. An empty string
+    is returned at the end of the input."""
+    if not sys.stdin.isatty():
+        return sys.stdin.read(1)
+
+    try:
+        import msvcrt
+    except ImportError:
+        import termios
+        import tty
+
+        fd = sys.stdin.fileno()
+        attributes = termios.tcgetattr(fd)
+        try:
+            tty.setraw(fd)
+            return sys.stdin.read(1)
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, attributes)
+
+    return msvcrt.getwch()
+
+
+def sample_chords(
+    chords_file, all_chords, chords, num_chords, mode, sample_size, costs=None
+):
+    """Orders chords using the given sampling mode. Transition costs are
+    computed for all chords in the file, so that the cached matrix can be
+    reused for any include and exclude filters, unless they are given."""
+    if mode == 'random':
+        chords = chords.copy()
+        shuffle(chords)
+        return chords[:num_chords]
+
+    from transitions import SAMPLING_MODES, cached_transition_costs
+
+    if costs is None:
+        costs = cached_transition_costs(chords_file, all_chords)
+    kept = {id(c) for c in chords}
+    indices = [i for i, c in enumerate(all_chords) if id(c) in kept]
+    costs = costs[indices][:, indices]
+
+    order = SAMPLING_MODES[mode](costs, num_chords, sample_size)
+    return [chords[i] for i in order]
+
+
 def parse_tag(tag) -> list[Chord]:
-    """Parses a tag file or a comma-separated list into a list of chords."""
+    """Parses a tag file or a comma-separated list into a list of chords. Names
+    are parsed as chord symbols, so any spelling of a chord matches it, e.g.,
+    Cmin7 matches Cm7."""
     chords = []
     if tag.endswith('.csv'):
         chords = load_chords(tag)
@@ -131,8 +250,8 @@ def parse_tag(tag) -> list[Chord]:
 
 def filter_chords(chords: list[Chord], include: list[Chord], exclude: list[Chord]):
     """Removes or keeps chords based on the include and exclude lists. Chords
-    in the filter lists are matched by name, and if the diagram is specified,
-    it must match as well."""
+    in the filter lists are matched by chord symbol, and if the diagram is
+    specified, it must match as well."""
     if include:
         chords = [c for c in chords if c in include]
     elif exclude:
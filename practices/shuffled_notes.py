@@ -10,11 +10,18 @@ Arguments:
     --flats: output flat notes as well
     --sharps: output sharp notes as well
     --text: display notes in the terminal
+    --sets num: number of note sets to write as text, default is 1
+    --seed num: seed of the random generator, for reproducible sets
+    --output file: write the note sets into a file instead of the terminal
     --help: show script usage documentation
 
 If both --flats and --sharps are specified, the output will contain both, but
 not enharmonically equivalent notes at the same time, e.g., F# and Gb.
 
+Many note sets, e.g., for worksheets, are generated in batches and written as
+they are generated, separated by empty lines:
+    python practices/shuffled_notes.py 12 --flats --sets 1000 --output notes.txt
+
 Keybindings:
     space: regenerate notes
     n: toggle natural notes
@@ -25,8 +32,12 @@ Keybindings:
     q: quit the program
 """
 
-from random import sample
-from sys import argv
+from sys import argv, stdout
+
+import numpy as np
+
+# Number of note sets generated at once
+BATCH_SIZE = 4096
 
 notes = [
     ('A',),
@@ -43,6 +54,10 @@ notes = [
     ('G#', 'Ab'),
 ]
 
+# Names of notes written with sharps in the first column and flats in the
+# second one, natural notes are the same in both
+NAMES = np.array([(note[0], note[-1]) for note in notes])
+
 
 def number_of_notes(natural, flats, sharps):
     notes = 7 * natural
@@ -59,6 +74,15 @@ def main():
     flats = False
     sharps = False
     text = False
+    num_sets, seed, output = 1, None, None
+
+    for i, arg in enumerate(argv):
+        if arg == '--sets' and i + 1 < len(argv):
+            num_sets = int(argv[i + 1])
+        elif arg == '--seed' and i + 1 < len(argv):
+            seed = int(argv[i + 1])
+        elif arg == '--output' and i + 1 < len(argv):
+            output = argv[i + 1]
 
     for arg in argv[1:]:
         flats = flats or arg == '--flats'
@@ -81,17 +105,18 @@ def main():
         print(f'Cannot generate {num_notes} notes, only {available} available.')
         exit(1)
 
-    lines, rows, cols = create_output_lines(num_notes, natural, flats, sharps)
+    rng = np.random.default_rng(seed)
 
-    if text:
-        for i in range(rows):
-            left = lines[i].strip()
-            right = lines[i + rows] if i + rows < len(lines) else ''
-            if not right:
-                print(left)
-            else:
-                print(f'{left:<8} {right}')
+    if text or num_sets > 1 or output:
+        args = num_sets, num_notes, natural, flats, sharps, rng
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                write_sets(f, *args)
+        else:
+            write_sets(stdout, *args)
     else:
+        lines, rows, cols = create_output_lines(num_notes, natural, flats, sharps, rng)
+
         import matplotlib.pyplot as plt
 
         plt.rcParams['toolbar'] = 'None'
@@ -113,10 +138,10 @@ def main():
 
             need_redraw = event.key in (' ', 'up', 'down', 'n', 'b', 's')
             if need_redraw:
-                args = create_output_lines(num_notes, natural, flats, sharps)
+                args = create_output_lines(num_notes, natural, flats, sharps, rng)
                 ax.cla()
                 render(*args, fig, ax)
-                plt.draw()
+                fig.canvas.draw_idle()
 
         fig.canvas.mpl_connect('key_press_event', on_key)
 
@@ -124,36 +149,75 @@ def main():
         plt.show()
 
 
-def create_output_lines(num_notes, natural, flats, sharps):
-    """Samples num_notes from note_indices and formats them into an enumerated
-    list. If accidentals are included, they are written as sharps or flats,
-    depending on the configuration."""
-
-    note_indices = []
+def note_indices(natural, flats, sharps):
+    """Returns indices of the available notes."""
+    indices = []
     if natural:
-        note_indices += [0, 1, 2, 3, 4, 5, 6]
+        indices += [0, 1, 2, 3, 4, 5, 6]
     if flats or sharps:
-        note_indices += [7, 8, 9, 10, 11]
-
-    selected_notes = sample(note_indices, num_notes)
-    output = ''
-    for i, note in enumerate(selected_notes):
-        if note < 7:
-            out = notes[note][0]
-        elif flats and sharps:
-            out = sample(notes[note], 1)[0]
-        elif flats:
-            out = notes[note][1]
-        elif sharps:
-            out = notes[note][0]
-        output += f'{i + 1:>2}. {out}\n'
-
-    # Format the output into two columns with a maximum of 6 notes per column
-    output = output.rstrip()
+        indices += [7, 8, 9, 10, 11]
+    return np.array(indices)
+
+
+def note_sets(num_sets, num_notes, natural, flats, sharps, rng=None):
+    """Generates independent sets of num_notes shuffled notes in batches, as
+    arrays of note names with a row for each set. Accidentals are written as
+    sharps or flats, depending on the configuration, or randomly as either if
+    both are included."""
+    rng = rng if rng is not None else np.random.default_rng()
+    indices = note_indices(natural, flats, sharps)
+    if num_notes > len(indices):
+        raise ValueError(f'Cannot generate {num_notes} notes from {len(indices)}.')
+
+    for start in range(0, num_sets, BATCH_SIZE):
+        size = min(BATCH_SIZE, num_sets - start)
+        shuffled = rng.permuted(np.broadcast_to(indices, (size, len(indices))), axis=1)
+        selected = shuffled[:, :num_notes]
+        if flats and sharps:
+            spelling = rng.integers(0, 2, size=selected.shape)
+        else:
+            spelling = int(flats)
+        yield NAMES[selected, spelling]
+
+
+def columns(num_notes):
+    """Returns the number of rows and columns of an enumerated list of notes,
+    with a maximum of 6 notes per column."""
     cols = 1 if num_notes <= 6 else 2
     rows = (num_notes // cols) + (num_notes % cols > 0)
-    lines = output.split('\n')
-
+    return rows, cols
+
+
+def text_layout(num_notes):
+    """Returns a format string which writes note names as an enumerated list
+    in columns. Numbers in the left column are always 1 digit."""
+    rows, _ = columns(num_notes)
+    lines = []
+    for i in range(rows):
+        line = f'{i + 1}. {{{i}}}'
+        if i + rows < num_notes:
+            line = f'{i + 1}. {{{i}:<5}} {i + rows + 1:>2}. {{{i + rows}}}'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def write_sets(file, num_sets, num_notes, natural, flats, sharps, rng=None):
+    """Writes note sets into the file as text, a batch of sets at a time."""
+    layout = text_layout(num_notes)
+    separator = ''
+    for batch in note_sets(num_sets, num_notes, natural, flats, sharps, rng):
+        file.write(separator + '\n\n'.join(layout.format(*n) for n in batch.tolist()))
+        separator = '\n\n'
+    file.write('\n')
+
+
+def create_output_lines(num_notes, natural, flats, sharps, rng=None):
+    """Samples num_notes notes and formats them into an enumerated list. If
+    accidentals are included, they are written as sharps or flats, depending
+    on the configuration."""
+    (names,) = next(note_sets(1, num_notes, natural, flats, sharps, rng))
+    lines = [f'{i + 1:>2}. {name}' for i, name in enumerate(names.tolist())]
+    rows, cols = columns(num_notes)
     return lines, rows, cols
 
 
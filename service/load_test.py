@@ -0,0 +1,162 @@
+"""Measures latency and throughput of the chord service with concurrent
+keep-alive connections.
+
+Usage:
+    python -m service.load_test [options]
+
+Arguments:
+    --host host: address of the service, default is 127.0.0.1
+    --port port: port of the service, default is 8000
+    --requests num: total number of requests, default is 2000
+    --concurrency num: number of concurrent connections, default is 16
+    --etag: send If-None-Match with ETags of previous responses
+    --help: show script usage documentation
+
+Requests are a mix of diagrams of all guitar and ukulele chords, chord samples
+and note samples. The first requests for each diagram are cache misses, so the
+script reports cold and warm runs separately.
+"""
+
+import asyncio
+import json
+import sys
+from random import Random
+from time import perf_counter
+from urllib.parse import quote
+
+
+class Client:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def get(self, target, headers=None):
+        """Sends a GET request on the kept-alive connection and returns the
+        status, headers and body of the response."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+
+        lines = [f'GET {target} HTTP/1.1', f'Host: {self.host}']
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').strip().split('\r\n')
+        response_headers = {}
+        for line in header_lines:
+            name, value = line.split(':', 1)
+            response_headers[name.strip().lower()] = value.strip()
+        length = int(response_headers.get('content-length', 0))
+        body = await self.reader.readexactly(length)
+        return int(status_line.split()[1]), response_headers, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+async def run(host, port, targets, concurrency, use_etags):
+    """Sends the requests from a shared queue and returns the latencies and
+    status codes of all requests, and the total time."""
+    queue = asyncio.Queue()
+    for target in targets:
+        queue.put_nowait(target)
+    latencies, statuses = [], {}
+    etags = {}
+
+    async def worker():
+        client = Client(host, port)
+        try:
+            while not queue.empty():
+                target = queue.get_nowait()
+                headers = {}
+                if use_etags and target in etags:
+                    headers['If-None-Match'] = etags[target]
+                start = perf_counter()
+                status, response_headers, _ = await client.get(target, headers)
+                latencies.append(perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                if 'etag' in response_headers:
+                    etags[target] = response_headers['etag']
+        finally:
+            await client.close()
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, perf_counter() - start
+
+
+def report(name, latencies, statuses, elapsed):
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        return 1000 * latencies[min(int(p / 100 * len(latencies)), len(latencies) - 1)]
+
+    print(
+        f'{name}: {len(latencies)} requests in {elapsed:.2f} s, '
+        f'{len(latencies) / elapsed:.0f} req/s'
+    )
+    print(
+        f'    latency p50 {percentile(50):.1f} ms, p90 {percentile(90):.1f} ms, '
+        f'p99 {percentile(99):.1f} ms, max {1000 * latencies[-1]:.1f} ms'
+    )
+    print(f'    statuses {dict(sorted(statuses.items()))}')
+
+
+async def main_async(host, port, num_requests, concurrency, use_etags):
+    client = Client(host, port)
+    targets = []
+    for instrument in ['guitar', 'ukulele']:
+        _, _, body = await client.get(f'/chords/{instrument}')
+        for chord in json.loads(body):
+            tag = quote(f'{chord["name"]}({chord["diagram"]})')
+            targets.append(f'/diagram/{instrument}?chord={tag}&fingering=1')
+    await client.close()
+
+    mixed = targets + [
+        '/samples/chords/guitar?n=2&mode=random',
+        '/samples/chords/guitar?n=3&mode=hardest',
+        '/samples/chords/guitar?n=2&chords=20&mode=coverage',
+        '/samples/notes?notes=8&flats=1&sharps=1',
+    ]
+    rng = Random(0)
+    warm = [rng.choice(mixed) for _ in range(num_requests)]
+
+    report('cold', *await run(host, port, targets, concurrency, use_etags))
+    report('warm', *await run(host, port, warm, concurrency, use_etags))
+
+    client = Client(host, port)
+    _, _, body = await client.get('/stats')
+    await client.close()
+    print(f'server stats {json.loads(body)}')
+
+
+def main():
+    host, port = '127.0.0.1', 8000
+    num_requests, concurrency = 2000, 16
+    use_etags = False
+
+    for i, arg in enumerate(sys.argv):
+        if arg == '--host' and i + 1 < len(sys.argv):
+            host = sys.argv[i + 1]
+        elif arg == '--port' and i + 1 < len(sys.argv):
+            port = int(sys.argv[i + 1])
+        elif arg == '--requests' and i + 1 < len(sys.argv):
+            num_requests = int(sys.argv[i + 1])
+        elif arg == '--concurrency' and i + 1 < len(sys.argv):
+            concurrency = int(sys.argv[i + 1])
+        elif arg == '--etag':
+            use_etags = True
+        elif arg == '--help':
+            print(__doc__, end='')
+            exit(0)
+
+    asyncio.run(main_async(host, port, num_requests, concurrency, use_etags))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+"""An asyncio HTTP service for chord diagrams and practice samples, so that a
+web frontend does not need to start a script for every request.
+
+Usage:
+    python -m service.server [options]
+
+Arguments:
+    --host host: address to listen on, default is 127.0.0.1
+    --port port: port to listen on, default is 8000
+    --workers num: number of rendering processes, default is the CPU count
+    --threads: render in threads instead of processes
+    --cache num: number of rendered images kept in memory, default is 512
+    --help: show script usage documentation
+
+Endpoints:
+    GET /chords/<instrument>
+        All chords of the instrument (guitar or ukulele) as JSON.
+    GET /diagram/<instrument>?chord=<chord>[&fingering=1][&name=1]
+        PNG diagram of the chord. The chord is written as in the --include
+        argument of practices/chord_changes.py, e.g., Am or F(1 3 3 2 1 1).
+        Responses have ETags and If-None-Match is answered with 304.
+    GET /samples/chords/<instrument>?[n=2][&chords=num][&mode=random]
+        [&include=tag][&exclude=tag]
+        Samples of chords for practicing chord changes, as JSON.
+    GET /samples/notes?notes=num[&natural=1][&flats=0][&sharps=0]
+        Shuffled notes in the two-column layout, as JSON.
+    GET /stats
+        Request and image cache counters, as JSON.
+
+Chord tables and transition costs are loaded once at startup, rendering runs
+in a worker pool and rendered images are kept in an LRU cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from chords import Chord, load_chords
+from practices.chord_changes import (
+    GUITAR_CHORDS,
+    UKULELE_CHORDS,
+    filter_chords,
+    parse_tag,
+    sample_chords,
+)
+from practices.shuffled_notes import create_output_lines, number_of_notes
+from transitions import SAMPLING_MODES, cached_transition_costs
+from utils import thread_renderer
+
+INSTRUMENTS = {'guitar': GUITAR_CHORDS, 'ukulele': UKULELE_CHORDS}
+MAX_HEADER_SIZE = 16384
+# Coverage sampling repeats chords, other modes use each chord at most once
+MAX_REPEATS = 4
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message=''):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+def render_diagram(chord: Chord, show_fingering, show_name) -> bytes:
+    """Renders the chord diagram as PNG bytes in a worker."""
+    renderer = thread_renderer()
+    return renderer.to_bytes(chord, show_fingering=show_fingering, show_name=show_name)
+
+
+def warm_up():
+    """Imports and initializes matplotlib in a new worker process."""
+    render_diagram(Chord('C', 'x 3 2 0 1 0', 'x 3 2 0 1 0'), False, False)
+
+
+class ChordService:
+    def __init__(self, executor, cache_size=512):
+        self.executor = executor
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'not_modified': 0}
+
+        # Keep chord tables and their transition costs warm
+        self.chords, self.costs = {}, {}
+        for instrument, filename in INSTRUMENTS.items():
+            self.chords[instrument] = load_chords(filename)
+            self.costs[instrument] = cached_transition_costs(
+                filename, self.chords[instrument]
+            )
+
+    def instrument_chords(self, instrument) -> list[Chord]:
+        if instrument not in self.chords:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f'Unknown instrument: {instrument}')
+        return self.chords[instrument]
+
+    async def handle(self, method, target, headers):
+        """Returns the status, headers and body of the response."""
+        self.stats['requests'] += 1
+        if method not in ('GET', 'HEAD'):
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+
+        if parts[:1] == ['chords'] and len(parts) == 2:
+            chords = self.instrument_chords(parts[1])
+            return json_response([chord_to_json(c) for c in chords])
+        if parts[:1] == ['diagram'] and len(parts) == 2:
+            return await self.diagram(parts[1], query, headers)
+        if parts[:2] == ['samples', 'chords'] and len(parts) == 3:
+            loop = asyncio.get_running_loop()
+            call = partial(self.chord_samples, parts[2], query)
+            return json_response(await loop.run_in_executor(None, call))
+        if parts == ['samples', 'notes']:
+            return json_response(note_samples(query))
+        if parts == ['stats']:
+            return json_response({**self.stats, 'cached': len(self.cache)})
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    async def diagram(self, instrument, query, headers):
+        chords = self.instrument_chords(instrument)
+        if 'chord' not in query:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Missing chord parameter.')
+        matches = filter_chords(chords, tag(query, 'chord'), [])
+        if not matches:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f'Unknown chord: {query["chord"]}')
+
+        chord = matches[0]
+        show_fingering = flag(query, 'fingering', False)
+        show_name = flag(query, 'name', False)
+        key = (instrument, repr(chord), show_fingering, show_name)
+
+        if key in self.cache:
+            self.stats['hits'] += 1
+            self.cache.move_to_end(key)
+            etag, body = self.cache[key]
+        else:
+            self.stats['misses'] += 1
+            etag, body = await self.render(key, chord, show_fingering, show_name)
+
+        response_headers = {
+            'Content-Type': 'image/png',
+            'ETag': etag,
+            'Cache-Control': 'public, max-age=3600',
+        }
+        if headers.get('if-none-match') == etag:
+            self.stats['not_modified'] += 1
+            return HTTPStatus.NOT_MODIFIED, response_headers, b''
+        return HTTPStatus.OK, response_headers, body
+
+    async def render(self, key, chord, show_fingering, show_name):
+        """Renders the diagram in the worker pool and caches it. Concurrent
+        requests for the same diagram wait for a single rendering."""
+        if key not in self.pending:
+            args = key, chord, show_fingering, show_name
+            self.pending[key] = asyncio.ensure_future(self.render_and_cache(*args))
+        return await asyncio.shield(self.pending[key])
+
+    async def render_and_cache(self, key, chord, show_fingering, show_name):
+        loop = asyncio.get_running_loop()
+        args = chord, show_fingering, show_name
+        try:
+            body = await loop.run_in_executor(self.executor, render_diagram, *args)
+        finally:
+            del self.pending[key]
+
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.cache[key] = etag, body
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return etag, body
+
+    def chord_samples(self, instrument, query):
+        all_chords = self.instrument_chords(instrument)
+        include, exclude = tag(query, 'include'), tag(query, 'exclude')
+        chords = filter_chords(all_chords, include, exclude)
+
+        sample_size = integer(query, 'n', 2)
+        num_chords = integer(query, 'chords', len(chords))
+        mode = query.get('mode', 'random')
+        if mode != 'random' and mode not in SAMPLING_MODES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'Unknown sampling mode: {mode}')
+        if not chords:
+            return {'samples': []}
+        if not 1 <= sample_size <= len(chords):
+            message = f'Sample size must be between 1 and {len(chords)}.'
+            raise HTTPError(HTTPStatus.BAD_REQUEST, message)
+        if num_chords < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Number of chords is negative.')
+        num_chords = min(num_chords, MAX_REPEATS * len(chords))
+
+        filename = INSTRUMENTS[instrument]
+        chords = sample_chords(
+            filename,
+            all_chords,
+            chords,
+            num_chords,
+            mode,
+            sample_size,
+            costs=self.costs[instrument],
+        )
+        samples = [
+            [chord_to_json(c) for c in chords[i : i + sample_size]]
+            for i in range(0, len(chords) - sample_size + 1, sample_size)
+        ]
+        return {'samples': samples}
+
+
+def note_samples(query):
+    natural = flag(query, 'natural', True)
+    flats = flag(query, 'flats', False)
+    sharps = flag(query, 'sharps', False)
+    available = number_of_notes(natural, flats, sharps)
+    num_notes = integer(query, 'notes', available)
+    if not 1 <= num_notes <= available:
+        message = f'Number of notes must be between 1 and {available}.'
+        raise HTTPError(HTTPStatus.BAD_REQUEST, message)
+
+    lines, rows, cols = create_output_lines(num_notes, natural, flats, sharps)
+    return {'lines': lines, 'rows': rows, 'cols': cols}
+
+
+def chord_to_json(chord: Chord):
+    def strings(values):
+        return ' '.join('x' if v is None else str(v) for v in values)
+
+    return {
+        'name': chord.name,
+        'diagram': strings(chord.diagram),
+        'fingering': strings(chord.fingering),
+    }
+
+
+def flag(query, name, default):
+    if name not in query:
+        return default
+    return query[name].lower() in ('1', 'true', 'yes')
+
+
+def integer(query, name, default):
+    try:
+        return int(query.get(name, default))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f'{name} must be an integer.')
+
+
+def tag(query, name):
+    """Parses chords in a tag parameter, no chords if it is missing."""
+    try:
+        return parse_tag(query[name]) if name in query else []
+    except ValueError as e:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+
+
+def json_response(data):
+    body = json.dumps(data).encode()
+    return HTTPStatus.OK, {'Content-Type': 'application/json'}, body
+
+
+async def serve_connection(service: ChordService, reader, writer):
+    """Serves requests on a connection until the client closes it or asks for
+    it to be closed. Connections are kept alive by default."""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except asyncio.LimitOverrunError:
+                await write_response(writer, *error_response(HTTPStatus.BAD_REQUEST))
+                break
+
+            lines = head.decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split()
+            except ValueError:
+                await write_response(writer, *error_response(HTTPStatus.BAD_REQUEST))
+                break
+
+            headers = {}
+            for line in lines[1:]:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            try:
+                status, response_headers, body = await service.handle(
+                    method, target, headers
+                )
+            except HTTPError as e:
+                status, response_headers, body = error_response(e.status, str(e))
+            except Exception as e:
+                print(f'Error handling {target}: {e!r}', file=sys.stderr)
+                status, response_headers, body = error_response(
+                    HTTPStatus.INTERNAL_SERVER_ERROR
+                )
+
+            # Request bodies are never read, so they would be taken for the next
+            # request on the connection
+            has_body = 'transfer-encoding' in headers or headers.get(
+                'content-length', '0'
+            ).strip() not in ('', '0')
+            connection = headers.get('connection', '').lower()
+            keep_alive = (
+                not has_body
+                and connection != 'close'
+                and (version == 'HTTP/1.1' or connection == 'keep-alive')
+            )
+            response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+            if method == 'HEAD':
+                response_headers['Content-Length'] = str(len(body))
+                body = b''
+            await write_response(writer, status, response_headers, body)
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+def error_response(status: HTTPStatus, message=''):
+    body = json.dumps({'error': message or status.phrase}).encode()
+    return status, {'Content-Type': 'application/json'}, body
+
+
+async def write_response(writer, status: HTTPStatus, headers, body):
+    headers.setdefault('Content-Length', str(len(body)))
+    head = f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+    head += ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+    writer.write(head.encode('latin-1') + b'\r\n' + body)
+    await writer.drain()
+
+
+async def run(host, port, executor, cache_size):
+    service = ChordService(executor, cache_size)
+    server = await asyncio.start_server(
+        partial(serve_connection, service), host, port, limit=MAX_HEADER_SIZE
+    )
+    print(f'Serving on http://{host}:{port}')
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    host, port = '127.0.0.1', 8000
+    workers = os.cpu_count() or 1
+    threads = False
+    cache_size = 512
+
+    for i, arg in enumerate(sys.argv):
+        if arg == '--host' and i + 1 < len(sys.argv):
+            host = sys.argv[i + 1]
+        elif arg == '--port' and i + 1 < len(sys.argv):
+            port = int(sys.argv[i + 1])
+        elif arg == '--workers' and i + 1 < len(sys.argv):
+            workers = int(sys.argv[i + 1])
+        elif arg == '--cache' and i + 1 < len(sys.argv):
+            cache_size = int(sys.argv[i + 1])
+        elif arg == '--threads':
+            threads = True
+        elif arg == '--help':
+            print(__doc__, end='')
+            exit(0)
+
+    if threads:
+        executor = ThreadPoolExecutor(workers)
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=warm_up)
+
+    with executor:
+        try:
+            asyncio.run(run(host, port, executor, cache_size))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import unittest
+import wave
+from concurrent.futures.process import BrokenProcessPool
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import numpy as np
+
+import audio
+from audio import SAMPLE_RATE, chord_clips, chord_pitches, strum
+
+
+class TestAudio(unittest.TestCase):
+    def test_chord_pitches(self):
+        self.assertEqual(
+            chord_pitches('standard', [None, 3, 2, 0, 1, 0]), [48, 52, 55, 60, 64]
+        )
+        self.assertEqual(chord_pitches('ukulele', [0, 0, 0, 3]), [67, 60, 64, 72])
+        with self.assertRaises(ValueError):
+            chord_pitches('ukulele', [None, 3, 2, 0, 1, 0])
+
+    def test_strum(self):
+        clips = strum([[48, 52, 55, 60, 64], [45]], 6)
+        self.assertEqual(clips.dtype, np.int16)
+        self.assertEqual(len(clips), 2)
+        np.testing.assert_array_equal(
+            np.abs(clips).max(axis=1), round(audio.PEAK * 32767)
+        )
+
+        # Later strings start with a delay, clips are padded for six strings
+        delay = int(audio.STRUM_DELAY * SAMPLE_RATE)
+        np.testing.assert_array_equal(clips[0, -delay:], 0)
+        self.assertTrue(clips[0, -2 * delay : -delay].any())
+        np.testing.assert_array_equal(clips[1, -5 * delay :], 0)
+
+    def test_chord_clips(self):
+        diagrams = [[0, 0, 0, 3], [2, 0, 0, 0], [0, 0, 0, 3]]
+        with TemporaryDirectory() as temp_dir:
+            with mock.patch.object(audio, 'CACHE_DIR', temp_dir):
+                filepaths = chord_clips('ukulele', diagrams)
+                self.assertEqual(filepaths[0], filepaths[2])
+                self.assertEqual(len(set(filepaths)), 2)
+                with wave.open(filepaths[0]) as f:
+                    self.assertEqual(f.getframerate(), SAMPLE_RATE)
+                    self.assertEqual(f.getsampwidth(), 2)
+                    self.assertGreater(f.getnframes(), SAMPLE_RATE)
+                self.assertTrue(all(path.dirname(f) == temp_dir for f in filepaths))
+
+    def test_broken_pool(self):
+        diagrams = [[0, 0, 0, 3], [2, 0, 0, 0]]
+        with TemporaryDirectory() as temp_dir:
+            with (
+                mock.patch.object(audio, 'CACHE_DIR', temp_dir),
+                mock.patch.object(audio, 'CLIPS_PER_WORKER', 1),
+                mock.patch.object(
+                    audio, 'ProcessPoolExecutor', side_effect=BrokenProcessPool
+                ),
+            ):
+                filepaths = chord_clips('ukulele', diagrams, workers=2)
+            self.assertTrue(all(path.exists(f) for f in filepaths))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from os import listdir, path
+from tempfile import TemporaryDirectory
+
+from cache import atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def test_write(self):
+        with TemporaryDirectory() as temp_dir:
+            filepath = path.join(temp_dir, 'clip.wav')
+            with atomic_write(filepath) as temp_path:
+                self.assertTrue(temp_path.endswith('.wav'))
+                self.assertFalse(path.exists(filepath))
+                with open(temp_path, 'wb') as f:
+                    f.write(b'data')
+
+            self.assertEqual(listdir(temp_dir), ['clip.wav'])
+            with open(filepath, 'rb') as f:
+                self.assertEqual(f.read(), b'data')
+
+    def test_interrupted_write(self):
+        with TemporaryDirectory() as temp_dir:
+            filepath = path.join(temp_dir, 'clip.wav')
+            with self.assertRaises(KeyboardInterrupt):
+                with atomic_write(filepath) as temp_path:
+                    with open(temp_path, 'wb') as f:
+                        f.write(b'truncated')
+                    raise KeyboardInterrupt
+            self.assertEqual(listdir(temp_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
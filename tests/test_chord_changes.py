@@ -0,0 +1,48 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from chords import Chord
+from practices import chord_changes
+
+
+class TestTextMode(unittest.TestCase):
+    def run_main(self, *args):
+        stdout = io.StringIO()
+        with (
+            mock.patch('sys.argv', ['chord_changes.py', *args]),
+            mock.patch.object(chord_changes, 'read_key', return_value=' '),
+            redirect_stdout(stdout),
+        ):
+            chord_changes.main()
+        return stdout.getvalue()
+
+    def test_more_chords_than_available(self):
+        output = self.run_main('ukulele', '--text', '--chords', '200')
+        self.assertIn('1/2', output)
+        self.assertIn('2/2', output)
+        self.assertNotIn('3/', output)
+
+    def test_coverage_repeats_chords(self):
+        output = self.run_main(
+            'ukulele', '--text', '--mode', 'coverage', '--chords', '12'
+        )
+        self.assertIn('6/6', output)
+        self.assertNotIn('7/', output)
+
+    def test_run_text_stops_at_end(self):
+        chords = [Chord('C', 'x 3 2 0 1 0', 'x 3 2 0 1 0')] * 3
+        stdout = io.StringIO()
+        with (
+            mock.patch.object(chord_changes, 'read_key', return_value=' '),
+            redirect_stdout(stdout),
+        ):
+            chord_changes.run_text(chords, 2, 5)
+        self.assertIn('1/5', stdout.getvalue())
+        self.assertIn('2/5', stdout.getvalue())
+        self.assertNotIn('3/5', stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
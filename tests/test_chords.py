@@ -0,0 +1,102 @@
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from chords import Chord, load_chords, parse_chord_symbol, side_by_side, text_diagram
+
+
+class TestChordSymbol(unittest.TestCase):
+    def test_parse(self):
+        for symbol, root, quality, extensions, alterations, bass in [
+            ('C', 'C', '', (), (), None),
+            ('Cbdim7', 'Cb', 'dim', ('7',), (), None),
+            ('F#m7b5', 'F#', 'm', ('7',), ('b5',), None),
+            ('A7sus4', 'A', '', ('7', 'sus4'), (), None),
+            ('Cmaj9#11', 'C', 'maj', ('9',), ('#11',), None),
+            ('F6/9', 'F', '', ('6/9',), (), None),
+            ('Dadd11/F#', 'D', '', ('add11',), (), 'F#'),
+            ('A#/Dadd13', 'A#', '', (), (), 'Dadd13'),
+            ('CmM7', 'C', 'm', ('maj7',), (), None),
+        ]:
+            chord = parse_chord_symbol(symbol)
+            self.assertEqual(chord.root, root)
+            self.assertEqual(chord.quality, quality)
+            self.assertEqual(chord.extensions, extensions)
+            self.assertEqual(chord.alterations, alterations)
+            self.assertEqual(chord.bass and chord.bass.name, bass)
+            self.assertEqual(''.join(chord.tokens), symbol)
+
+    def test_canonical(self):
+        self.assertEqual(parse_chord_symbol('Cmin7').name, 'Cm7')
+        self.assertEqual(parse_chord_symbol('Cmin7'), parse_chord_symbol('Cm7'))
+        self.assertEqual(parse_chord_symbol('C7b9#5'), parse_chord_symbol('C7#5b9'))
+        self.assertNotEqual(parse_chord_symbol('C#'), parse_chord_symbol('Db'))
+        self.assertIs(parse_chord_symbol('Cm7'), parse_chord_symbol('Cm7'))
+        self.assertEqual(parse_chord_symbol('Cmaj'), parse_chord_symbol('C'))
+        self.assertEqual(parse_chord_symbol('CM'), parse_chord_symbol('C'))
+        self.assertEqual(parse_chord_symbol('CmM7'), parse_chord_symbol('Cmmaj7'))
+        self.assertNotEqual(parse_chord_symbol('Cmaj7'), parse_chord_symbol('C7'))
+        self.assertEqual(Chord('Amin7', 'x 0 2 0 1 0'), Chord('Am7', 'x 0 2 0 1 0'))
+
+    def test_invalid(self):
+        for symbol in [
+            '',
+            'H',
+            'cm',
+            'Cadd',
+            'Cm7b',
+            'C7/',
+            'C/H',
+            'Cadd9add',
+            'C69',
+            'Cadd8',
+            'Cm7b5b5',
+            'Csus4sus4',
+            'C/E/G',
+        ]:
+            with self.assertRaises(ValueError):
+                parse_chord_symbol(symbol)
+
+        with TemporaryDirectory() as temp_dir:
+            filename = path.join(temp_dir, 'chords.csv')
+            with open(filename, 'w') as f:
+                f.write('name,diagram\nC,x 3 2 0 1 0\nHm,x 2 4 4 3 2\n')
+            with self.assertRaisesRegex(ValueError, 'line 3'):
+                load_chords(filename)
+
+
+class TestTextDiagram(unittest.TestCase):
+    def test_open_chord(self):
+        chord = Chord('C', 'x 3 2 0 1 0', 'x 3 2 0 1 0')
+        self.assertEqual(
+            text_diagram(chord, show_fingering=True),
+            [
+                '     C',
+                'x     o   o',
+                '╒═╤═╤═╤═╤═╕',
+                '│ │ │ │ 1 │',
+                '├─┼─┼─┼─┼─┤',
+                '│ │ 2 │ │ │',
+                '├─┼─┼─┼─┼─┤',
+                '│ 3 │ │ │ │',
+                '├─┼─┼─┼─┼─┤',
+                '│ │ │ │ │ │',
+                '├─┼─┼─┼─┼─┤',
+                '│ │ │ │ │ │',
+                '└─┴─┴─┴─┴─┘',
+            ],
+        )
+
+    def test_barre(self):
+        chord = Chord('Bm7', 'x 7 9 7 8 7', 'x 1 3 1 2 1')
+        lines = text_diagram(chord, show_name=False)
+        self.assertEqual(lines[1], '  ┌─┬─┬─┬─┬─┐')
+        self.assertEqual(lines[2], '7 │ ●━━━━━━━●')
+        self.assertEqual(lines[4], '  │ │ │ │ ● │')
+
+    def test_side_by_side(self):
+        self.assertEqual(side_by_side([['ab', 'c'], ['d']], gap=1), ['ab d', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from decks import circle_of_fifths
+from decks.circle_of_fifths import render_key_signature
+
+
+class TestKeySignatures(unittest.TestCase):
+    def setUp(self):
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        patcher = mock.patch.object(circle_of_fifths, 'CACHE_DIR', temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        version = f'v{circle_of_fifths.KEY_SIGNATURE_VERSION}'
+        self.version_dir = path.join(temp_dir.name, version)
+
+    def test_cache_paths(self):
+        for args, filename in [
+            ((0, 0), 'key_signature_treble_natural.png'),
+            ((3, 0), 'key_signature_treble_3_sharps.png'),
+            ((0, 5), 'key_signature_treble_5_flats.png'),
+            ((0, 0, 'bass'), 'key_signature_bass_natural.png'),
+            ((7, 0, 'alto'), 'key_signature_alto_7_sharps.png'),
+        ]:
+            filepath = render_key_signature(*args)
+            self.assertEqual(filepath, path.join(self.version_dir, filename))
+            self.assertTrue(path.exists(filepath))
+
+    def test_cached_image_is_reused(self):
+        with mock.patch.object(
+            circle_of_fifths, 'key_signature', wraps=circle_of_fifths.key_signature
+        ) as draw:
+            first = render_key_signature(2, 0, 'bass')
+            with open(first, 'rb') as f:
+                contents = f.read()
+            second = render_key_signature(2, 0, 'bass')
+
+        self.assertEqual(first, second)
+        self.assertEqual(draw.call_count, 1)
+        with open(second, 'rb') as f:
+            self.assertEqual(f.read(), contents)
+
+    def test_unknown_clef(self):
+        argv = ['circle_of_fifths.py', '--clefs', 'treble,tenor']
+        stdout = io.StringIO()
+        with (
+            mock.patch.object(circle_of_fifths, 'argv', argv),
+            mock.patch.object(circle_of_fifths, 'build_deck') as build_deck,
+            redirect_stdout(stdout),
+        ):
+            with self.assertRaises(SystemExit) as cm:
+                circle_of_fifths.main()
+
+        self.assertEqual(cm.exception.code, 1)
+        self.assertIn('Unknown clef: tenor', stdout.getvalue())
+        build_deck.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from chords import Chord
+from utils import DiagramRenderer, thread_renderer
+
+
+class TestDiagramRenderer(unittest.TestCase):
+    def test_reused_renderer(self):
+        barre = Chord('Em', 'x 7 9 9 8 7', 'x 1 3 4 2 1')
+        open_chord = Chord('C', 'x 3 2 0 1 0', 'x 3 2 0 1 0')
+
+        # Nothing of the barre chord may be left on the reused figure
+        renderer = DiagramRenderer()
+        renderer.to_bytes(barre, show_fingering=True)
+        for kwargs in [{}, {'show_fingering': True}, {'show_name': False}]:
+            self.assertEqual(
+                renderer.to_bytes(open_chord, **kwargs),
+                DiagramRenderer().to_bytes(open_chord, **kwargs),
+            )
+
+    def test_thread_renderer(self):
+        self.assertIs(thread_renderer(), thread_renderer())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+from matplotlib.transforms import Bbox
+from PIL import Image
+
+from chords import Chord
+from decks.guitar_chord_notes import crop, render_atlas, render_chords
+
+
+class TestChordImages(unittest.TestCase):
+    def test_atlas_tile_size(self):
+        chords = [
+            Chord('C', 'x 3 2 0 1 0', 'x 3 2 0 1 0'),
+            Chord('F', '1 3 3 2 1 1', '1 3 4 2 1 1'),
+            Chord('Em', 'x 7 9 9 8 7', 'x 1 3 4 2 1'),
+        ]
+        with TemporaryDirectory() as temp_dir:
+            separate = [path.join(temp_dir, f's{i}.png') for i in range(3)]
+            tiles = [path.join(temp_dir, f't{i}.png') for i in range(3)]
+            render_chords(chords, separate)
+            render_atlas(chords, tiles)
+            for separate_file, tile_file in zip(separate, tiles):
+                with Image.open(separate_file) as image, Image.open(tile_file) as tile:
+                    self.assertEqual(tile.size, image.size)
+
+    def test_crop(self):
+        pixels = np.arange(100 * 80).reshape(100, 80)
+        tile = crop(pixels, Bbox.from_extents(10.5, 20, 30.5, 70), 5)
+        self.assertEqual(tile.shape, (60, 30))
+        np.testing.assert_array_equal(tile, pixels[25:85, 5:35])
+
+        # Regions beyond the buffer are clamped to its edges
+        tile = crop(pixels, Bbox.from_extents(-3, -3, 40, 97), 5)
+        np.testing.assert_array_equal(tile, pixels[:, :45])
+        tile = crop(pixels, Bbox.from_extents(60, 50, 90, 120), 5)
+        np.testing.assert_array_equal(tile, pixels[:55, 55:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import unittest
+import zipfile
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+
+import genanki
+
+from package_writer import merge_media, write_package
+from utils import card_model
+
+
+def read_package(filepath, temp_dir):
+    """Returns the media and the contents of all tables of the collection."""
+    with zipfile.ZipFile(filepath) as package:
+        media = json.loads(package.read('media'))
+        media = {name: package.read(i) for i, name in media.items()}
+        package.extract('collection.anki2', temp_dir)
+
+    conn = sqlite3.connect(path.join(temp_dir, 'collection.anki2'))
+    tables = {}
+    for table in ['notes', 'cards', 'revlog', 'graves']:
+        tables[table] = conn.execute(f'SELECT * FROM {table} ORDER BY 1').fetchall()
+
+    # Columns with JSON are compared as parsed objects
+    row = conn.execute('SELECT * FROM col').fetchone()
+    tables['col'] = [json.loads(v) if isinstance(v, str) and v else v for v in row]
+    conn.close()
+    return media, tables
+
+
+class TestPackageWriter(unittest.TestCase):
+    def test_matches_genanki(self):
+        first = genanki.Deck(1541482719, 'Music::First')
+        second = genanki.Deck(1440356293, 'Music::Second')
+        for i in range(50):
+            deck = first if i % 2 else second
+            fields = [f'Question {i}', f'Answer {i}<br><b>{i}</b>']
+            deck.add_note(genanki.Note(model=card_model, fields=fields, tags=['t']))
+
+        # Cloze notes with the same empty fields have different numbers of cards
+        for i in range(10):
+            text = f'{{{{c1::Cloze {i}}}}}' + ' {{c2::second}}' * (i % 3)
+            note = genanki.Note(model=genanki.CLOZE_MODEL, fields=[text, 'Extra'])
+            first.add_note(note)
+
+        with TemporaryDirectory() as temp_dir:
+            media_file = path.join(temp_dir, 'image.png')
+            with open(media_file, 'wb') as f:
+                f.write(b'not really an image')
+
+            expected = path.join(temp_dir, 'genanki.apkg')
+            package = genanki.Package([first, second], [media_file])
+            package.write_to_file(expected, timestamp=1700000000.5)
+            actual = path.join(temp_dir, 'bulk.apkg')
+            write_package([first, second], actual, [media_file], 1700000000.5)
+
+            self.assertEqual(
+                read_package(actual, path.join(temp_dir, 'actual')),
+                read_package(expected, path.join(temp_dir, 'expected')),
+            )
+
+    def test_field_count(self):
+        deck = genanki.Deck(1541482719, 'Music::Test')
+        deck.add_note(genanki.Note(model=card_model, fields=['Only front']))
+        with TemporaryDirectory() as temp_dir:
+            with self.assertRaises(ValueError):
+                write_package(deck, path.join(temp_dir, 'deck.apkg'))
+
+    def test_merge_media(self):
+        with TemporaryDirectory() as temp_dir:
+            files = {}
+            for name, content in [
+                ('first/a.png', b'same'),
+                ('first/b.png', b'first'),
+                ('second/c.png', b'same'),
+                ('second/b.png', b'second'),
+            ]:
+                files[name] = path.join(temp_dir, name)
+                makedirs(path.dirname(files[name]), exist_ok=True)
+                with open(files[name], 'wb') as f:
+                    f.write(content)
+
+            first = genanki.Deck(1541482719, 'Music::First')
+            second = genanki.Deck(1440356293, 'Music::Second')
+            first.add_note(
+                genanki.Note(model=card_model, fields=['<img src="a.png">', 'b.png'])
+            )
+            note = genanki.Note(
+                model=card_model, fields=['<img src="c.png">', '<img src="b.png">']
+            )
+            guid = note.guid
+            second.add_note(note)
+
+            decks, media = merge_media(
+                [
+                    ([first], [files['first/a.png'], files['first/b.png']]),
+                    ([second], [files['second/c.png'], files['second/b.png']]),
+                ]
+            )
+
+        renamed = [name for name in media if name.startswith('b_')]
+        self.assertEqual(len(media), 3)
+        self.assertEqual(len(renamed), 1)
+        self.assertEqual(media['a.png'], files['first/a.png'])
+        self.assertEqual(media[renamed[0]], files['second/b.png'])
+        self.assertEqual(decks[0].notes, first.notes)
+        merged = decks[1].notes[0]
+        self.assertEqual(
+            merged.fields, ['<img src="a.png">', f'<img src="{renamed[0]}">']
+        )
+        self.assertEqual(merged.guid, guid)
+
+        # Given decks are not changed, so media can be merged again
+        self.assertEqual(note.fields, ['<img src="c.png">', '<img src="b.png">'])
+        self.assertEqual(note.guid, guid)
+        self.assertIsNot(decks[1], second)
+        self.assertEqual(second.notes, [note])
+
+
+if __name__ == '__main__':
+    unittest.main()
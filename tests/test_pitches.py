@@ -0,0 +1,37 @@
+import unittest
+
+from utils import TUNINGS, note_to_midi, pitch_matrix
+
+
+class TestPitches(unittest.TestCase):
+    def test_note_to_midi(self):
+        for arg, out in [
+            ('C4', 60),
+            ('A4', 69),
+            ('E2', 40),
+            ('C#4', 61),
+            ('Bb3', 58),
+            ('Cb4', 59),
+        ]:
+            self.assertEqual(note_to_midi(arg), out)
+
+        for note in ['C', 'H2', 'X#3', '#4', '2', 'C#x4']:
+            with self.assertRaises(ValueError):
+                note_to_midi(note)
+
+    def test_pitch_matrix(self):
+        pitches = pitch_matrix(TUNINGS['standard'])
+        self.assertEqual(pitches.shape, (6, 25))
+        self.assertEqual(list(pitches[:, 0]), [40, 45, 50, 55, 59, 64])
+
+        # Neighboring strings meet at the fifth fret, except for G and B
+        self.assertEqual(pitches[0, 5], pitches[1, 0])
+        self.assertEqual(pitches[3, 4], pitches[4, 0])
+        self.assertEqual(pitches[5, 24], 88)
+
+        with self.assertRaises(ValueError):
+            pitch_matrix(TUNINGS['standard'], 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
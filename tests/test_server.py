@@ -0,0 +1,101 @@
+import asyncio
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from unittest import mock
+
+from service import server
+from service.server import ChordService, HTTPError
+
+
+def fake_render(chord, show_fingering, show_name):
+    return f'{chord!r} {show_fingering} {show_name}'.encode()
+
+
+class TestChordService(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(2)
+        self.service = ChordService(self.executor, cache_size=2)
+        patcher = mock.patch.object(server, 'render_diagram', side_effect=fake_render)
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    async def get(self, target, headers=None):
+        return await self.service.handle('GET', target, headers or {})
+
+    async def assertStatus(self, status, target):
+        with self.assertRaises(HTTPError) as cm:
+            await self.get(target)
+        self.assertEqual(cm.exception.status, status)
+
+    async def test_diagram_etag(self):
+        status, headers, body = await self.get('/diagram/guitar?chord=Am')
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(headers['Content-Type'], 'image/png')
+        self.assertTrue(body)
+
+        etag = headers['ETag']
+        status, headers, body = await self.get(
+            '/diagram/guitar?chord=Am', {'if-none-match': etag}
+        )
+        self.assertEqual(status, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(headers['ETag'], etag)
+        self.assertEqual(body, b'')
+        self.assertEqual(self.render.call_count, 1)
+        self.assertEqual(self.service.stats['not_modified'], 1)
+
+    async def test_cache_eviction(self):
+        for chord in ['A', 'C', 'A', 'D']:
+            await self.get(f'/diagram/guitar?chord={chord}')
+        self.assertEqual(self.render.call_count, 3)
+        self.assertEqual(len(self.service.cache), 2)
+
+        # A was used more recently than C, so C was evicted
+        await self.get('/diagram/guitar?chord=A')
+        self.assertEqual(self.render.call_count, 3)
+        await self.get('/diagram/guitar?chord=C')
+        self.assertEqual(self.render.call_count, 4)
+
+    async def test_render_deduplication(self):
+        targets = ['/diagram/guitar?chord=Am'] * 5
+        responses = await asyncio.gather(*(self.get(t) for t in targets))
+        self.assertEqual(self.render.call_count, 1)
+        self.assertEqual(len({body for _, _, body in responses}), 1)
+        self.assertEqual(self.service.pending, {})
+
+    async def test_not_found(self):
+        await self.assertStatus(HTTPStatus.NOT_FOUND, '/chords/banjo')
+        await self.assertStatus(HTTPStatus.NOT_FOUND, '/diagram/banjo?chord=Am')
+        await self.assertStatus(HTTPStatus.NOT_FOUND, '/diagram/guitar?chord=C13')
+        await self.assertStatus(HTTPStatus.NOT_FOUND, '/unknown')
+
+    async def test_bad_request(self):
+        await self.assertStatus(HTTPStatus.BAD_REQUEST, '/samples/chords/guitar?n=x')
+        await self.assertStatus(HTTPStatus.BAD_REQUEST, '/samples/notes?notes=two')
+        await self.assertStatus(HTTPStatus.BAD_REQUEST, '/diagram/guitar?chord=Am(1 2')
+        await self.assertStatus(HTTPStatus.BAD_REQUEST, '/diagram/guitar')
+
+    async def test_sample_bounds(self):
+        target = '/samples/chords/ukulele'
+        await self.assertStatus(HTTPStatus.BAD_REQUEST, f'{target}?n=5')
+        await self.assertStatus(HTTPStatus.BAD_REQUEST, f'{target}?n=0')
+        await self.assertStatus(HTTPStatus.BAD_REQUEST, f'{target}?chords=-1')
+
+        _, _, body = await self.get(f'{target}?mode=coverage&chords=2000000')
+        samples = json.loads(body)['samples']
+        self.assertEqual(len(samples), server.MAX_REPEATS * 4 // 2)
+
+    async def test_costs_kept_in_memory(self):
+        with mock.patch('transitions.cached_transition_costs') as cached_costs:
+            for mode in ['hardest', 'coverage', 'weighted']:
+                _, _, body = await self.get(f'/samples/chords/guitar?mode={mode}')
+                self.assertTrue(json.loads(body)['samples'])
+        cached_costs.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import io
+import unittest
+
+import numpy as np
+
+from practices.shuffled_notes import create_output_lines, note_sets, write_sets
+
+
+class TestShuffledNotes(unittest.TestCase):
+    def test_note_sets(self):
+        (sets,) = note_sets(1000, 12, True, False, True, np.random.default_rng(0))
+        self.assertEqual(sets.shape, (1000, 12))
+        for notes in sets.tolist():
+            self.assertEqual(len(set(notes)), 12)
+            self.assertFalse(any(note.endswith('b') for note in notes))
+
+        (sets,) = note_sets(1000, 5, False, True, True, np.random.default_rng(0))
+        flats = np.char.endswith(sets, 'b')
+        self.assertTrue(flats.any() and not flats.all())
+
+        with self.assertRaises(ValueError):
+            next(note_sets(1, 8, True, False, False))
+
+    def test_seed(self):
+        outputs = []
+        for _ in range(2):
+            f = io.StringIO()
+            write_sets(f, 3, 8, True, True, True, np.random.default_rng(1))
+            outputs.append(f.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+
+        blocks = outputs[0].strip().split('\n\n')
+        self.assertEqual(len(blocks), 3)
+        self.assertEqual(blocks[0].split('\n')[0][:3], '1. ')
+        self.assertEqual(blocks[0].split('\n')[0][10:13], '5. ')
+
+    def test_create_output_lines(self):
+        lines, rows, cols = create_output_lines(7, True, False, False)
+        self.assertEqual((rows, cols), (4, 2))
+        self.assertEqual([line[:4] for line in lines[:2]], [' 1. ', ' 2. '])
+        self.assertEqual(sorted(line[4:] for line in lines), list('ABCDEFG'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from chords import Chord
+from transitions import (
+    estimate_fingering,
+    hardest_first,
+    spaced_coverage,
+    transition_costs,
+    weighted_random,
+)
+
+
+class TestTransitions(unittest.TestCase):
+    def setUp(self):
+        self.chords = [
+            Chord('C', 'x 3 2 0 1 0', 'x 3 2 0 1 0'),
+            Chord('Am', 'x 0 2 2 1 0', 'x 0 2 3 1 0'),
+            Chord('F', '1 3 3 2 1 1', '1 3 4 2 1 1'),
+            Chord('G', '3 2 0 0 0 3', '2 1 0 0 0 3'),
+            Chord('Em', '0 2 2 0 0 0', '0 2 3 0 0 0'),
+            Chord('D', 'x x 0 2 3 2', 'x x 0 1 3 2'),
+        ]
+        self.costs = transition_costs(self.chords)
+
+    def test_estimate_fingering(self):
+        for diagram, out in [
+            ([1, 3, 3, 2, 1, 1], [1, 3, 4, 2, 1, 1]),
+            ([None, 0, 2, 2, 2, None], [None, 0, 1, 2, 3, None]),
+            ([None, 3, 2, 0, 1, 0], [None, 3, 2, 0, 1, 0]),
+        ]:
+            self.assertEqual(estimate_fingering(diagram), out)
+
+    def test_transition_costs(self):
+        self.assertEqual(self.costs.shape, (6, 6))
+        np.testing.assert_array_equal(self.costs, self.costs.T)
+        np.testing.assert_array_equal(np.diag(self.costs), 0)
+        self.assertTrue((self.costs[~np.eye(6, dtype=bool)] > 0).all())
+
+        # C to Am keeps two fingers in place, C to F adds a barre
+        self.assertLess(self.costs[0, 1], self.costs[0, 2])
+
+    def test_transition_costs_blocks(self):
+        blocks = transition_costs(self.chords, block_size=4)
+        np.testing.assert_array_equal(blocks, self.costs)
+
+    def test_hardest_first(self):
+        order = hardest_first(self.costs, 6, 2)
+        self.assertEqual(sorted(order), list(range(6)))
+        first = self.costs[order[0], order[1]]
+        self.assertEqual(first, self.costs.max())
+
+    def test_spaced_coverage(self):
+        rng = np.random.default_rng(0)
+        order = spaced_coverage(self.costs, 30, 2, rng)
+        pairs = {frozenset(order[i : i + 2]) for i in range(0, len(order), 2)}
+        self.assertEqual(len(pairs), 15)
+
+    def test_weighted_random(self):
+        rng = np.random.default_rng(0)
+        order = weighted_random(self.costs, 4, 2, rng)
+        self.assertEqual(len(order), 4)
+        self.assertEqual(len(set(order)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
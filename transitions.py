@@ -0,0 +1,245 @@
+"""Chord transition costs and cost-aware orderings of chords for practicing
+chord changes.
+
+The cost of changing from one chord to another is estimated from the chord
+diagrams and fingerings: fingers that move, are lifted or placed, barres that
+appear or disappear, and strings that switch between played and muted. All
+costs are computed for every pair of chords at once using NumPy.
+"""
+
+import hashlib
+from os import mkdir, path
+
+import numpy as np
+
+from cache import atomic_write
+from chords import Chord, load_chords
+
+CACHE_DIR = '.cache'
+
+# Bump when the cost model changes to invalidate cached matrices
+COST_VERSION = 1
+
+FINGERS = 4
+FRET_WEIGHT = 1.0
+STRING_WEIGHT = 0.5
+PLACE_WEIGHT = 1.0
+SPAN_WEIGHT = 0.5
+BARRE_WEIGHT = 2.0
+MUTE_WEIGHT = 0.5
+
+_memory_cache = {}
+
+
+def estimate_fingering(diagram):
+    """Estimates a fingering for a diagram without one. The lowest fret is
+    barred with the first finger if it is used on several strings including
+    the lowest played one, the remaining notes get the next fingers in order
+    of frets and strings."""
+    fretted = [(f, s) for s, f in enumerate(diagram) if f]
+    fingering = [None if f is None else 0 for f in diagram]
+    if not fretted:
+        return fingering
+
+    lowest = min(f for f, _ in fretted)
+    bass = next(f for f in diagram if f is not None)
+    on_lowest = [s for f, s in fretted if f == lowest]
+    finger = 1
+    if len(on_lowest) > 1 and bass == lowest:
+        for s in on_lowest:
+            fingering[s] = 1
+        fretted = [(f, s) for f, s in fretted if f != lowest]
+        finger = 2
+
+    for _, s in sorted(fretted):
+        fingering[s] = min(finger, FINGERS)
+        finger += 1
+    return fingering
+
+
+def chord_arrays(chords: list[Chord]):
+    """Converts chords into frets and fingers arrays of shape (chords,
+    strings), where muted strings are represented with -1."""
+    num_strings = max(len(c.diagram) for c in chords)
+    frets = np.full((len(chords), num_strings), -1, dtype=np.int16)
+    fingers = np.full((len(chords), num_strings), -1, dtype=np.int8)
+
+    for i, chord in enumerate(chords):
+        fingering = chord.fingering or estimate_fingering(chord.diagram)
+        for s, (fret, finger) in enumerate(zip(chord.diagram, fingering)):
+            if fret is not None:
+                frets[i, s] = fret
+                fingers[i, s] = finger or 0
+    return frets, fingers
+
+
+def finger_positions(frets, fingers):
+    """Returns which fingers are used, their frets, mean string positions and
+    spans over strings (non-zero for barres), each of shape (chords, 4)."""
+    strings = np.arange(frets.shape[1])
+    shape = (frets.shape[0], FINGERS)
+    used = np.zeros(shape, dtype=bool)
+    fret = np.zeros(shape, dtype=np.float32)
+    string = np.zeros(shape, dtype=np.float32)
+    span = np.zeros(shape, dtype=np.float32)
+
+    for k in range(FINGERS):
+        mask = fingers == k + 1
+        count = mask.sum(axis=1)
+        used[:, k] = count > 0
+        fret[:, k] = np.where(mask, frets, 0).max(axis=1)
+        string[:, k] = (mask * strings).sum(axis=1) / np.maximum(count, 1)
+        first = np.where(mask, strings, frets.shape[1]).min(axis=1)
+        last = np.where(mask, strings, -1).max(axis=1)
+        span[:, k] = np.where(used[:, k], last - first, 0)
+    return used, fret, string, span
+
+
+def transition_costs(chords: list[Chord], block_size=128):
+    """Computes a symmetric matrix of costs for changing between each pair of
+    chords. Rows are computed in blocks to bound memory for large inputs."""
+    frets, fingers = chord_arrays(chords)
+    used, fret, string, span = finger_positions(frets, fingers)
+    barre = (span > 0).any(axis=1)
+
+    # Strings switching between played and muted, via mask products
+    played = (frets >= 0).astype(np.float32)
+    num_played = played.sum(axis=1)
+    mute_changes = num_played[:, None] + num_played[None, :] - 2 * played @ played.T
+
+    n = len(chords)
+    costs = np.empty((n, n), dtype=np.float32)
+    for start in range(0, n, block_size):
+        rows = slice(start, start + block_size)
+        block = MUTE_WEIGHT * mute_changes[rows]
+        block += BARRE_WEIGHT * (barre[rows, None] ^ barre[None, :])
+
+        for k in range(FINGERS):
+            move = FRET_WEIGHT * np.abs(fret[rows, k, None] - fret[None, :, k])
+            move += STRING_WEIGHT * np.abs(string[rows, k, None] - string[None, :, k])
+            move += SPAN_WEIGHT * np.abs(span[rows, k, None] - span[None, :, k])
+            u_a, u_b = used[rows, k, None], used[None, :, k]
+            block += np.where(u_a & u_b, move, PLACE_WEIGHT * (u_a ^ u_b))
+
+        costs[rows] = block
+
+    np.fill_diagonal(costs, 0)
+    return costs
+
+
+def cached_transition_costs(filename, chords: list[Chord] | None = None):
+    """Returns the transition costs for all chords in the chord file. Matrices
+    are cached in memory and on disk, keyed by the contents of the file."""
+    with open(filename, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    key = f'{digest}_{COST_VERSION}'
+    if key in _memory_cache:
+        return _memory_cache[key]
+
+    name = path.splitext(path.basename(filename))[0]
+    cache_file = path.join(CACHE_DIR, f'transitions_{name}_{key}.npy')
+    if path.exists(cache_file):
+        costs = np.load(cache_file)
+    else:
+        costs = transition_costs(chords or load_chords(filename))
+        if not path.exists(CACHE_DIR):
+            mkdir(CACHE_DIR)
+        with atomic_write(cache_file) as temp_path:
+            np.save(temp_path, costs)
+
+    _memory_cache[key] = costs
+    return costs
+
+
+def hardest_first(costs, num_chords, sample_size, rng=None):
+    """Orders chords into samples with the most difficult changes first. Each
+    sample starts with the hardest pair of unused chords and is extended with
+    the unused chord hardest to reach from the last one."""
+    n = len(costs)
+    num_chords = min(num_chords, n)
+    if sample_size == 1:
+        order = np.argsort(-costs.sum(axis=1), kind='stable')[:num_chords]
+        return [int(i) for i in order]
+
+    used = np.zeros(n, dtype=bool)
+    order = []
+
+    rows, cols = np.triu_indices(n, k=1)
+    pairs = np.argsort(-costs[rows, cols], kind='stable')
+    rows, cols = rows[pairs], cols[pairs]
+    for start in range(0, len(pairs), 4096):
+        # Skip pairs with already used chords for the whole chunk at once
+        chunk_a, chunk_b = rows[start : start + 4096], cols[start : start + 4096]
+        free = ~used[chunk_a] & ~used[chunk_b]
+        for a, b in zip(chunk_a[free], chunk_b[free]):
+            if len(order) + sample_size > num_chords:
+                return order
+            if used[a] or used[b]:
+                continue
+
+            sample = [int(a), int(b)]
+            used[sample] = True
+            while len(sample) < sample_size:
+                reach = np.where(used, -np.inf, costs[sample[-1]])
+                sample.append(int(np.argmax(reach)))
+                used[sample[-1]] = True
+            order += sample
+    return order
+
+
+def spaced_coverage(costs, num_chords, sample_size, rng=None):
+    """Orders chords into samples that cover changes between as many pairs of
+    chords as possible. Chords that complete uncovered pairs are preferred,
+    ties are broken in favor of chords not practiced for the longest time."""
+    rng = rng or np.random.default_rng()
+    n = len(costs)
+    uncovered = ~np.eye(n, dtype=bool)
+    remaining = uncovered.sum(axis=1)
+    last_used = np.full(n, -n, dtype=np.float64)
+    order = []
+
+    for s in range(num_chords // sample_size):
+        # Random jitter breaks ties between otherwise equal chords
+        staleness = (s - last_used) + rng.random(n) * 0.5
+        score = remaining * n + staleness
+        sample = [int(np.argmax(score))]
+        while len(sample) < min(sample_size, n):
+            score = uncovered[sample].sum(axis=0) * n + staleness
+            score[sample] = -np.inf
+            sample.append(int(np.argmax(score)))
+
+        block = np.ix_(sample, sample)
+        remaining[sample] -= uncovered[block].sum(axis=1)
+        uncovered[block] = False
+        last_used[sample] = s
+        order += sample
+    return order
+
+
+def weighted_random(costs, num_chords, sample_size, rng=None):
+    """Orders chords randomly, picking each next chord in a sample with
+    probability proportional to the cost of changing to it. The first chord of
+    each sample is weighted by its total cost to all other chords."""
+    rng = rng or np.random.default_rng()
+    n = len(costs)
+    num_chords = min(num_chords, n)
+    available = np.ones(n, dtype=bool)
+    totals = costs.sum(axis=1)
+    order = []
+
+    while len(order) < num_chords:
+        weights = totals if len(order) % sample_size == 0 else costs[order[-1]]
+        weights = np.where(available, weights, 0).astype(np.float64)
+        if weights.sum() <= 0:
+            weights = available.astype(np.float64)
+        chord = int(rng.choice(n, p=weights / weights.sum()))
+        available[chord] = False
+        order.append(chord)
+    return order
+
+
+SAMPLING_MODES = {
+    'hardest': hardest_first,
+    'coverage': spaced_coverage,
+    'weighted': weighted_random,
+}
@@ -1,5 +1,15 @@
+import io
+import threading
+from functools import lru_cache
+
 import genanki
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import Circle, Rectangle
+
+from chords import Chord, parse_chord_symbol
 
 styling = """
 .card {
@@ -33,6 +43,56 @@ card_model = genanki.Model(
 )
 
 
+NOTE_NAMES = [
+    ('C',),
+    ('C#', 'Db'),
+    ('D',),
+    ('D#', 'Eb'),
+    ('E',),
+    ('F',),
+    ('F#', 'Gb'),
+    ('G',),
+    ('G#', 'Ab'),
+    ('A',),
+    ('A#', 'Bb'),
+    ('B',),
+]
+
+# Open strings from the lowest to the highest string
+TUNINGS = {
+    'standard': 'E2 A2 D3 G3 B3 E4',
+    'drop-d': 'D2 A2 D3 G3 B3 E4',
+    'dadgad': 'D2 A2 D3 G3 A3 D4',
+    'open-g': 'D2 G2 D3 G3 B3 D4',
+    'ukulele': 'G4 C4 E4 A4',
+    'bass': 'E1 A1 D2 G2',
+}
+
+
+def note_to_midi(note):
+    """Converts a note with an octave, e.g., C#4, into a MIDI note number."""
+    octave_start = len(note.rstrip('0123456789'))
+    name, octave = note[:octave_start], note[octave_start:]
+    if not octave:
+        raise ValueError(f'Note {note} is missing an octave.')
+    if not name or name[0].upper() not in 'ABCDEFG' or name[1:].strip('#b'):
+        raise ValueError(f'Note {note} has an invalid name.')
+
+    pitch = next(i for i, n in enumerate(NOTE_NAMES) if name[0].upper() in n)
+    pitch += name.count('#') - name[1:].count('b')
+    return 12 * (int(octave) + 1) + pitch
+
+
+def pitch_matrix(tuning, num_frets=24):
+    """Returns a matrix of MIDI note numbers with a row for each string in the
+    space-separated tuning and a column for each fret, starting with the open
+    string."""
+    if not 0 <= num_frets <= 24:
+        raise ValueError('Number of frets must be between 0 and 24.')
+    open_strings = np.array([note_to_midi(n) for n in tuning.split()])
+    return open_strings[:, None] + np.arange(num_frets + 1)[None, :]
+
+
 def note_to_latex(note):
     name = r'\text{' + note[0] + '}'
     for accidental in note[1:]:
@@ -55,76 +115,29 @@ def degree_to_latex(degree):
     return r'\(' + name + r'\)'
 
 
+@lru_cache(maxsize=4096)
 def chord_to_latex(chord):
-    name = ''
-    i = 0
-    while i < len(chord):
-        if chord[i] not in ['#', 'b', '/'] and not chord[i].isdigit():
-            name += r'\text{' + chord[i]
-            i += 1
-            while (
-                i < len(chord)
-                and chord[i].isalpha()
-                and chord[i] not in ['#', 'b', '/']
-            ):
-                name += chord[i]
-                i += 1
-            name += '}'
+    """Converts a chord symbol into LaTeX. Consecutive letters of the root,
+    quality and modifiers are written as text, accidentals as symbols."""
+    name = text = ''
+    for token in parse_chord_symbol(chord).tokens:
+        if token.isalpha() and token != 'b':
+            text += token
             continue
-        elif chord[i] == '#':
+        if text:
+            name += r'\text{' + text + '}'
+            text = ''
+        if token == '#':
             name += r'\sharp'
-        elif chord[i] == 'b':
+        elif token == 'b':
             name += r'\flat'
         else:
-            name += chord[i]
-        i += 1
+            name += token
+    if text:
+        name += r'\text{' + text + '}'
     return r'\(' + name + r'\)'
 
 
-class Chord:
-    def __init__(self, name, diagram='', fingering='', notes='', degrees=''):
-        """Initializes a chord with its name, diagram, fingering, notes, and
-        degrees. The diagram, fingering, notes and degrees are space-separated
-        strings, with unused strings represented by 'x' in all cases.
-        """
-        self.name = name
-        self.diagram = [None if d == 'x' else int(d) for d in diagram.split()]
-        self.fingering = [None if f == 'x' else int(f) for f in fingering.split()]
-        self.notes = notes.split()
-        self.degrees = degrees.split()
-
-        lengths = {
-            len(self.diagram),
-            len(self.fingering),
-            len(self.notes),
-            len(self.degrees),
-        }
-        assert len(lengths) == 1 or len(lengths - {0}) == 1
-
-    def __repr__(self):
-        return f'{self.name}({self.diagram}, {self.fingering})'
-
-    def __eq__(self, other):
-        if not isinstance(other, Chord):
-            return False
-        equal = self.name == other.name
-        if self.diagram != [] and other.diagram != []:
-            equal = equal and self.diagram == other.diagram
-        if self.fingering != [] and other.fingering != []:
-            equal = equal and self.fingering == other.fingering
-        return equal
-
-
-def load_chords(filename) -> list[Chord]:
-    chords = []
-    with open(filename, 'r', encoding='utf-8') as f:
-        next(f)
-        for line in f:
-            args = line.strip().split(',')
-            chords.append(Chord(*args))
-    return chords
-
-
 def blank_diagram(ax, num_strings, first_fret=1):
     """Draws a blank chord diagram on the given axes. Number of strings is
     supplied to support guitar and ukulele chords. If the first fret is 1,
@@ -134,22 +147,22 @@ def blank_diagram(ax, num_strings, first_fret=1):
 
     # Frame
     w, h = num_strings - 1, 7
-    ax.add_patch(plt.Rectangle((0, 0), w, h, ec='black', fc='white', lw=1.5))
+    ax.add_patch(Rectangle((0, 0), w, h, ec='black', fc='white', lw=1.5))
 
     # Interior strings
     for x in range(num_strings - 2):
-        ax.add_line(plt.Line2D([x + 1, x + 1], [0, h], color='black', lw=1.5))
+        ax.add_line(Line2D([x + 1, x + 1], [0, h], color='black', lw=1.5))
 
     # Frets
     fret_length = num_strings - 1
     num_frets = 5
     for i in range(4):
         y = h * (i + 1) / num_frets
-        ax.add_line(plt.Line2D([0, fret_length], [y, y], color='black', lw=1.5))
+        ax.add_line(Line2D([0, fret_length], [y, y], color='black', lw=1.5))
 
     if first_fret == 1:
         # Nut
-        ax.add_patch(plt.Rectangle((0, h), fret_length, 0.1, color='black', lw=1.5))
+        ax.add_patch(Rectangle((0, h), fret_length, 0.1, color='black', lw=1.5))
     else:
         kwargs = {'fontsize': 16, 'ha': 'center', 'va': 'center'}
         x, y = fret_length + 0.55, (h + 0.7) - h / num_frets
@@ -178,7 +191,7 @@ def chord_diagram(chord: Chord, ax, show_fingering=False, show_name=True):
             bar_fret = chord.diagram[bar_start] - first_fret + 1
             x, y = bar_start, 7.7 - 7 * bar_fret / 5 - 0.35
             width, height = bar_end - bar_start, 0.7
-            ax.add_patch(plt.Rectangle((x, y), width, height, color='k', lw=0))
+            ax.add_patch(Rectangle((x, y), width, height, color='k', lw=0))
 
     for string, (fret, finger) in enumerate(zip(chord.diagram, chord.fingering)):
         if not fret:
@@ -194,7 +207,7 @@ def chord_diagram(chord: Chord, ax, show_fingering=False, show_name=True):
             y = 7.7 - 7 * (fret - first_fret + 1) / 5
             x = string
             if finger not in bars or string in bars[finger]:
-                ax.add_patch(plt.Circle((x, y), 0.35, color='black', lw=0))
+                ax.add_patch(Circle((x, y), 0.35, color='black', lw=0))
             if show_fingering:
                 kwargs = {'ha': 'center', 'va': 'center', 'color': 'white'}
                 ax.text(x, y - 0.05, finger, fontsize=14, **kwargs)
@@ -203,3 +216,167 @@ def chord_diagram(chord: Chord, ax, show_fingering=False, show_name=True):
     ax.set_xlim(-1, num_strings)
     ax.set_ylim(-0.1, 8)
     ax.axis('off')
+
+
+# Positions of accidentals in key signatures, in staff steps above the bottom
+# line of the treble clef, and offsets of the other clefs from these positions
+SHARP_STEPS = [8, 5, 9, 6, 3, 7, 4]
+FLAT_STEPS = [4, 7, 3, 6, 2, 5, 1]
+CLEF_OFFSETS = {'treble': 0, 'bass': -2, 'alto': -1}
+
+# Control points of the clef curves in staff spaces
+TREBLE_CLEF = [
+    (1.25, 1.0),
+    (1.65, 1.45),
+    (1.45, 2.05),
+    (0.9, 2.15),
+    (0.4, 1.6),
+    (0.45, 0.6),
+    (1.0, 0.05),
+    (1.75, 0.2),
+    (2.15, 1.0),
+    (2.0, 2.0),
+    (1.5, 2.8),
+    (0.95, 3.6),
+    (0.85, 4.6),
+    (1.1, 5.6),
+    (1.45, 5.9),
+    (1.55, 5.2),
+    (1.25, 4.3),
+    (1.2, 3.0),
+    (1.3, 0.5),
+    (1.35, -0.9),
+    (1.05, -1.45),
+    (0.6, -1.25),
+]
+BASS_CLEF = [
+    (0.45, 3.0),
+    (0.5, 3.6),
+    (1.2, 4.05),
+    (1.95, 3.5),
+    (1.95, 2.4),
+    (1.4, 1.3),
+    (0.3, 0.3),
+]
+ALTO_CLEF = [(0.75, 0), (1.05, 0.5), (1.25, 1.7), (1.75, 2.0), (2.15, 1.5), (1.95, 0.9)]
+
+
+def spline(points, samples=16):
+    """Returns points on a Catmull-Rom spline passing through all the given
+    points."""
+    p = np.asarray(points, dtype=float)
+    p = np.vstack([p[0], p, p[-1]])
+    t = np.linspace(0, 1, samples, endpoint=False)[:, None]
+    curve = []
+    for p0, p1, p2, p3 in zip(p, p[1:], p[2:], p[3:]):
+        curve.append(
+            p1
+            + 0.5 * (p2 - p0) * t
+            + (p0 - 2.5 * p1 + 2 * p2 - 0.5 * p3) * t**2
+            + (-0.5 * p0 + 1.5 * p1 - 1.5 * p2 + 0.5 * p3) * t**3
+        )
+    curve.append(p[-2:-1])
+    return np.vstack(curve)
+
+
+def draw_curve(ax, points, lw):
+    x, y = spline(points).T
+    ax.add_line(Line2D(x, y, color='black', lw=lw, solid_capstyle='round'))
+
+
+def draw_clef(ax, clef):
+    """Draws a clef at the start of a staff with lines at y = 0, ..., 4."""
+    if clef == 'treble':
+        draw_curve(ax, TREBLE_CLEF, 3)
+        ax.add_patch(Circle((0.72, -1.05), 0.28, color='black'))
+    elif clef == 'bass':
+        draw_curve(ax, BASS_CLEF, 3.5)
+        for xy, radius in [((0.55, 3), 0.38), ((2.55, 3.5), 0.17), ((2.55, 2.5), 0.17)]:
+            ax.add_patch(Circle(xy, radius, color='black'))
+    elif clef == 'alto':
+        ax.add_line(Line2D([0.25, 0.25], [0, 4], color='black', lw=6))
+        ax.add_line(Line2D([0.7, 0.7], [0, 4], color='black', lw=2))
+        for sign in [1, -1]:
+            draw_curve(ax, [(x, 2 + sign * y) for x, y in ALTO_CLEF], 3)
+            ax.add_patch(Circle((1.7, 2 + sign * 1.05), 0.25, color='black'))
+    else:
+        raise ValueError(f'Unknown clef: {clef}')
+
+
+def draw_sharp(ax, x, y):
+    for dx in [-0.15, 0.15]:
+        xs, ys = [x + dx, x + dx], [y - 1.1 - dx / 2, y + 1.2 - dx / 2]
+        ax.add_line(Line2D(xs, ys, color='black', lw=1.3))
+    for dy in [-0.38, 0.38]:
+        ys = [y + dy - 0.12, y + dy + 0.12]
+        ax.add_line(Line2D([x - 0.33, x + 0.33], ys, color='black', lw=3.2))
+
+
+def draw_flat(ax, x, y):
+    ax.add_line(Line2D([x - 0.25, x - 0.25], [y - 0.5, y + 1.9], color='black', lw=1.3))
+    belly = [(x - 0.25, y + 0.1), (x + 0.05, y + 0.45), (x + 0.32, y + 0.4)]
+    belly += [(x + 0.3, y + 0.05), (x, y - 0.3), (x - 0.25, y - 0.5)]
+    draw_curve(ax, belly, 2.2)
+
+
+def key_signature(ax, sharps, flats, clef='treble'):
+    """Draws a staff with the clef and the key signature with the given number
+    of sharps or flats on the given axes. The staff has room for seven
+    accidentals, so all key signatures have the same size."""
+    for y in range(5):
+        ax.add_line(Line2D([0, 9.8], [y, y], color='black', lw=1.2))
+    draw_clef(ax, clef)
+
+    offset = CLEF_OFFSETS[clef]
+    for i, step in enumerate(SHARP_STEPS[:sharps]):
+        draw_sharp(ax, 3.4 + 0.9 * i, (step + offset) / 2)
+    for i, step in enumerate(FLAT_STEPS[:flats]):
+        draw_flat(ax, 3.4 + 0.9 * i, (step + offset) / 2)
+
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_xlim(-0.3, 10.1)
+    ax.set_ylim(-2, 6.2)
+    ax.axis('off')
+
+
+class DiagramRenderer:
+    def __init__(self, figsize=(4, 6)):
+        """Renders chord diagrams onto an owned figure and Agg canvas, without
+        using pyplot. The figure is reused for all chords, so a renderer must
+        not be shared between threads, see thread_renderer()."""
+        self.figure = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+
+    def clear(self):
+        """Removes the previous diagram, keeping the axes and their ticks,
+        which are expensive to recreate."""
+        ax = self.ax
+        for artist in [*ax.patches, *ax.lines, *ax.texts, *ax.collections]:
+            artist.remove()
+        ax.set_title('')
+
+    def render(self, chord: Chord, show_fingering=False, show_name=True):
+        self.clear()
+        chord_diagram(chord, self.ax, show_fingering, show_name)
+
+    def save(self, chord: Chord, file, fmt='png', **kwargs):
+        """Renders the chord and saves the diagram into a file name or a file
+        object, trimmed as with bbox_inches='tight'."""
+        self.render(chord, **kwargs)
+        self.figure.savefig(file, format=fmt, bbox_inches='tight')
+
+    def to_bytes(self, chord: Chord, fmt='png', **kwargs) -> bytes:
+        buffer = io.BytesIO()
+        self.save(chord, buffer, fmt, **kwargs)
+        return buffer.getvalue()
+
+
+_local = threading.local()
+
+
+def thread_renderer() -> DiagramRenderer:
+    """Returns a diagram renderer owned by the calling thread."""
+    if not hasattr(_local, 'renderer'):
+        _local.renderer = DiagramRenderer()
+    return _local.renderer